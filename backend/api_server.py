@@ -1,14 +1,33 @@
 # api_server.py 
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
 from utility.patientManagementSystem import MainModule
-from typing import Optional
-import csv
+from utility.patientStore import PatientStore
+from utility.predictionBatcher import PredictionBatcher
+from treeUtility.forestEngine import ForestEngine
+from utility import metrics
+from contextlib import asynccontextmanager
+from typing import List, Optional
+import io
 import math
-import statistics
+import time
+import pandas as pd
+import threading
+import traceback
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app):
+    """Load/train the horizon models in the background so the API can serve right away."""
+    threading.Thread(target=prepare_models, daemon=True).start()
+    batcher.start()
+    yield
+    await batcher.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",
@@ -24,30 +43,33 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def read_all_rows():
-    """Read CSV and return list of dicts with typed values."""
-    rows = []
-    with open(CSV_PATH, "r", newline='') as f:
-        reader = csv.DictReader(f)
-        for r in reader:
-            try:
-                rows.append({
-                    "patient_id": int(r["patient_id"]),
-                    "cholesterol": float(r["cholesterol"]),
-                    "blood_pressure": float(r["blood_pressure"]),
-                    "age": int(float(r["age"])),
-                    "glucose": float(r["glucose"]),
-                    "bmi": float(r["bmi"]),
-                })
-            except Exception:
-                continue
-    return rows
+# Outermost, so request latency includes CORS handling
+app.add_middleware(metrics.MetricsMiddleware)
 
 CSV_PATH = "data/patients.csv"
 CSV_PATH_LABELS = "data/labels.csv"
 CSV_FIELDS = ["patient_id","cholesterol","blood_pressure","age","glucose","bmi"]
 
-system = MainModule(CSV_PATH, CSV_PATH_LABELS)
+store = PatientStore(CSV_PATH)
+system = MainModule(CSV_PATH, CSV_PATH_LABELS, store=store, defer_models=True)
+engine = None
+engine_lock = threading.Lock()
+# Concurrent /predict rows are scored together: up to 64 rows or 2 ms per batch, in a worker process
+batcher = PredictionBatcher(max_batch=64, max_wait=0.002, workers=1)
+
+def rebuild_engine(year=None):
+    """Repack the inference engine over the horizons that are ready."""
+    global engine
+    # Horizons can finish together; the lock keeps an older snapshot from replacing a newer one
+    with engine_lock:
+        models = system.models
+        engine = ForestEngine(models) if models else None
+
+def prepare_models():
+    try:
+        system.prepare_models(on_ready=rebuild_engine)
+    except Exception:
+        traceback.print_exc()
 
 class PatientInput(BaseModel):
     cholesterol: float
@@ -57,17 +79,131 @@ class PatientInput(BaseModel):
     bmi: float
 
 @app.post("/predict")
-def predict_disease(patient: PatientInput):
+async def predict_disease(patient: PatientInput):
     new_data = [patient.cholesterol, patient.blood_pressure, patient.age, patient.glucose, patient.bmi]
 
     disease_names = ["Healthy", "Diabetes", "Heart Disease", "Lung Disease"]
     predictions = {}
+    confidence = {}
+
+    current = engine
+    if current is not None:
+        # Keyed on the engine version, so results from an engine that has been replaced never hit;
+        # misses wait for the next micro-batch instead of traversing the forests on this request
+        results = await system.prediction_cache.get_or_compute_async(
+            ("engine", current.version), new_data, lambda features: batcher.predict(current, features))
+        for year, (pred, proba) in results.items():
+            predictions[year] = disease_names[pred]
+            confidence[year] = float(proba[pred])
+
+    pending = [year for year in system.model_status if year not in predictions]
+    return {"predictions": predictions, "confidence": confidence, "pending": pending}
+
+class BatchInput(BaseModel):
+    patients: Optional[List[PatientInput]] = None
+    start_id: Optional[int] = None
+    end_id: Optional[int] = None
+
+MAX_BATCH_ROWS = 200_000
+
+@app.post("/predict/batch")
+async def predict_batch(request: Request):
+    """
+    Score many patients in one call. Accepts either
+      - JSON: {"patients": [PatientInput, ...]} or {"start_id": a, "end_id": b} for stored patients
+      - text/csv: a file with cholesterol, blood_pressure, age, glucose, bmi columns (patient_id optional)
+      - multipart/form-data: the same CSV uploaded as a "file" field (curl -F file=@patients.csv)
+    """
+    content_type = request.headers.get("content-type", "")
+    if "multipart/form-data" in content_type:
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=422, detail='Upload the CSV as a "file" form field')
+        body = await upload.read()
+        content_type = "text/csv"
+    else:
+        body = await request.body()
+    with metrics.stage("batch.parse"):
+        ids, features, start_id, end_id = parse_batch(content_type, body)
+
+    # An id range is limited like an explicit list: it is scored and serialized in one response too
+    n_rows = len(features) if features is not None else len(await run_in_threadpool(store.id_range, start_id, end_id))
+    if n_rows > MAX_BATCH_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_ROWS} rows per batch")
+
+    start = time.perf_counter()
+    result = await run_in_threadpool(system.predict_many, features, start_id, end_id)
+    elapsed = time.perf_counter() - start
+
+    with metrics.stage("batch.serialize"):
+        disease_names = ["Healthy", "Diabetes", "Heart Disease", "Lung Disease"]
+        years = [col for col in result.columns if col != "patient_id"]
+        if ids is None and "patient_id" in result.columns:
+            ids = result["patient_id"].tolist()
+        labels = {year: [disease_names[pred] for pred in result[year].tolist()] for year in years}
+
+        predictions = []
+        for i in range(len(result)):
+            row = {year: labels[year][i] for year in years}
+            if ids is not None:
+                row = {"patient_id": ids[i], **row}
+            predictions.append(row)
 
-    for year, model in system.models.items():
-        pred = model.predict([new_data])[0]
-        predictions[year] = disease_names[pred]
+    return {
+        "predictions": predictions,
+        "count": len(result),
+        "pending": [year for year in system.model_status if year not in years],
+        "seconds": elapsed,
+        "rows_per_second": len(result) / elapsed if elapsed > 0 else None,
+    }
 
-    return {"predictions": predictions}
+def parse_batch(content_type, body):
+    """Read a batch body into (ids, features, start_id, end_id); ids/features are None when not given."""
+    ids = None
+    features = None
+    start_id = end_id = None
+
+    if "text/csv" in content_type:
+        try:
+            df = pd.read_csv(io.BytesIO(body))
+        except Exception:
+            raise HTTPException(status_code=400, detail="Could not parse CSV body")
+        missing = [col for col in system.feature_cols if col not in df.columns]
+        if missing:
+            raise HTTPException(status_code=422, detail=f"CSV is missing columns: {missing}")
+        features = df[system.feature_cols].to_numpy(dtype=float)
+        if "patient_id" in df.columns:
+            ids = df["patient_id"].tolist()
+    else:
+        try:
+            batch = BatchInput.model_validate_json(body or b"{}")
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        if batch.patients is not None:
+            features = [[p.cholesterol, p.blood_pressure, p.age, p.glucose, p.bmi] for p in batch.patients]
+        elif batch.start_id is None and batch.end_id is None:
+            raise HTTPException(status_code=422, detail="Send patients, an id range, or a CSV body")
+        start_id, end_id = batch.start_id, batch.end_id
+    return ids, features, start_id, end_id
+
+@app.get("/ready")
+def readiness():
+    status = dict(system.model_status)
+    n_ready = sum(1 for state in status.values() if state == "ready")
+    return {
+        "ready": n_ready == len(status),
+        "progress": n_ready / len(status) if status else 1.0,
+        "horizons": status,
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus text exposition of request, stage and model metrics."""
+    for year, state in system.model_status.items():
+        metrics.set_gauge("pdp_model_ready", 1 if state == "ready" else 0, horizon=year)
+    metrics.set_gauge("pdp_prediction_cache_entries", system.prediction_cache.stats()["size"])
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/patients")
 def get_patients(
@@ -81,44 +217,21 @@ def get_patients(
     sort_by: Optional[str] = Query("patient_id"),
     sort_dir: Optional[str] = Query("asc"),
 ):
-    rows = read_all_rows()
-
-    # Filtering
-    def passes(r):
-        if min_age is not None and r["age"] < min_age: return False
-        if max_age is not None and r["age"] > max_age: return False
-        if min_bmi is not None and r["bmi"] < min_bmi: return False
-        if max_bmi is not None and r["bmi"] > max_bmi: return False
-        if q:
-            ql = q.lower()
-            if ql.isdigit():
-                if (str(r["patient_id"]).lower().find(ql) == -1 and
-                    str(r["age"]).find(ql) == -1):
-                    return False
-            else:
-                if ql not in str(r["patient_id"]).lower():
-                    return False
-        return True
-
-    filtered = [r for r in rows if passes(r)]
+    # Filtering (on one snapshot, so a reload mid-request cannot mix two versions)
+    data = store.refresh()
+    with metrics.stage("patients.filter"):
+        mask = store.filter_mask(q, min_age, max_age, min_bmi, max_bmi, data=data)
 
     # Sorting
     if sort_by not in CSV_FIELDS:
         sort_by = "patient_id"
     reverse = (sort_dir.lower() == "desc")
-    try:
-        if sort_by == "patient_id":
-            filtered.sort(key=lambda x: int(x["patient_id"]), reverse=reverse)
-        else:
-            filtered.sort(key=lambda x: float(x[sort_by]), reverse=reverse)
-    except Exception:
-        pass
 
-    total = len(filtered)
-    total_pages = math.ceil(total / page_size) if page_size else 1
     start = (page - 1) * page_size
     end = start + page_size
-    page_rows = filtered[start:end]
+    with metrics.stage("patients.page"):
+        total, page_rows = store.page(mask, sort_by, reverse, start, end, data=data)
+    total_pages = math.ceil(total / page_size) if page_size else 1
 
     return {
         "patients": page_rows,
@@ -128,51 +241,13 @@ def get_patients(
         "total_pages": total_pages,
     }
 
-@app.get("/patients/{patient_id}")
-def get_patient(patient_id: str):
-    rows = read_all_rows()
-    for r in rows:
-        if str(r["patient_id"]) == str(patient_id):
-            return {"patient": r}
-    raise HTTPException(status_code=404, detail="Patient not found")
-
 @app.get("/patients/stats")
 def patients_stats():
-    rows = read_all_rows()
-    if not rows:
-        return {"count": 0, "averages": {}, "histograms": {}}
-
-    ages = [r["age"] for r in rows]
-    bmis = [r["bmi"] for r in rows]
-    chol = [r["cholesterol"] for r in rows]
-    bp = [r["blood_pressure"] for r in rows]
-    glucose = [r["glucose"] for r in rows]
-
-    def hist(values, buckets=10):
-        mn, mx = min(values), max(values)
-        if mn == mx:
-            return [{"min": mn, "max": mx, "count": len(values)}]
-        step = (mx - mn) / buckets
-        bins = []
-        for b in range(buckets):
-            lo = mn + b*step
-            hi = lo + step
-            count = sum(1 for v in values if (v >= lo and v < hi) or (b == buckets-1 and v == mx))
-            bins.append({"min": lo, "max": hi, "count": count})
-        return bins
+    return store.stats()
 
-    return {
-        "count": len(rows),
-        "averages": {
-            "age": statistics.mean(ages),
-            "bmi": statistics.mean(bmis),
-            "cholesterol": statistics.mean(chol),
-            "blood_pressure": statistics.mean(bp),
-            "glucose": statistics.mean(glucose),
-        },
-        "histograms": {
-            "age": hist(ages, buckets=10),
-            "bmi": hist(bmis, buckets=10),
-            "cholesterol": hist(chol, buckets=10),
-        }
-    }
+@app.get("/patients/{patient_id}")
+def get_patient(patient_id: str):
+    patient = store.get(patient_id) if patient_id.isdigit() else None
+    if patient is not None:
+        return {"patient": patient}
+    raise HTTPException(status_code=404, detail="Patient not found")
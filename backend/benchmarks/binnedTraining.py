@@ -0,0 +1,45 @@
+# binnedTraining.py
+# Run from backend/:  python -m benchmarks.binnedTraining --patients 10000 50000
+import argparse
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import randomForest
+
+def run(num_patients, n_trees, max_depth, max_bins, label="5-year", seed=0):
+    """Train exact and histogram-mode forests on the same split; return accuracy and wall time of each."""
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=num_patients, output_dir=tmp, seed=seed)
+
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+    y = labels_df[label].to_numpy()
+    idx = np.random.default_rng(seed).permutation(len(X))
+    split = int(len(X) * 0.8)
+    train_idx, test_idx = idx[:split], idx[split:]
+
+    results = {}
+    for mode, bins in (("exact", None), ("binned", max_bins)):
+        np.random.seed(seed)
+        model = randomForest.RandomForest(n_trees=n_trees, max_depth=max_depth, min_samples_split=3, max_bins=bins)
+        start = time.time()
+        model.fit(X[train_idx], y[train_idx])
+        fit_time = time.time() - start
+        acc = np.mean(model.predict(X[test_idx]) == y[test_idx])
+        results[mode] = (acc, fit_time)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exact vs histogram-binned RandomForest training")
+    parser.add_argument("--patients", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--trees", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=40)
+    parser.add_argument("--max-bins", type=int, default=255)
+    args = parser.parse_args()
+
+    print(f"\n{'patients':>10} {'mode':>8} {'accuracy':>10} {'fit time':>10}")
+    for n in args.patients:
+        results = run(n, args.trees, args.max_depth, args.max_bins)
+        for mode, (acc, fit_time) in results.items():
+            print(f"{n:>10} {mode:>8} {acc * 100:>9.2f}% {fit_time:>9.2f}s")
+        print(f"{'':>10} speedup: {results['exact'][1] / results['binned'][1]:.1f}x")
@@ -0,0 +1,57 @@
+# forestMemory.py
+# Run from backend/:  python -m benchmarks.forestMemory --patients 10000 --trees 50
+import argparse
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import randomForest
+
+def fit_forest(X, y, n_trees, max_depth, tree_options):
+    """Fit a forest with extra DecisionTree options; return (forest, fit seconds, bytes retained)."""
+    forest = randomForest.RandomForest(n_trees=n_trees, max_depth=max_depth, min_samples_split=3, random_state=0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.time()
+
+    # Same steps as RandomForest.fit, with the tree options passed through
+    X_scaled = forest.scaler.fit_transform(X)
+    forest.n_classes = int(np.max(y)) + 1
+    forest.metadata = {"n_samples": len(X), "n_features": X.shape[1], "random_state": 0}
+    tree_params = {"max_depth": max_depth, "min_samples_split": 3, "n_features": None, "criterion": "gini", **tree_options}
+    forest.trees, _, _ = randomForest.fit_trees(X_scaled, y, None, tree_params, np.random.SeedSequence(0).spawn(n_trees))
+    forest.compile()
+
+    elapsed = time.time() - start
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return forest, elapsed, retained
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forest memory: full Node graphs vs pruned flat-only trees")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=args.patients, output_dir=tmp, seed=0)
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+    y = labels_df["5-year"].to_numpy()
+
+    setups = {
+        "nodes kept": {"prune": False, "keep_nodes": True},
+        "pruned": {"prune": True, "keep_nodes": False},
+    }
+    results = {name: fit_forest(X, y, args.trees, args.max_depth, options) for name, options in setups.items()}
+
+    print(f"\n{'setup':>11} {'nodes':>9} {'leaves':>9} {'retained MB':>12} {'report MB':>10} {'fit s':>7}")
+    for name, (forest, elapsed, retained) in results.items():
+        report = forest.memory_report()
+        print(f"{name:>11} {report['nodes']:>9} {report['leaves']:>9} {retained / 2**20:>12.1f} "
+              f"{report['total_bytes'] / 2**20:>10.1f} {elapsed:>7.1f}")
+
+    full, pruned = results["nodes kept"][0], results["pruned"][0]
+    same = np.array_equal(full.predict(X), pruned.predict(X))
+    print(f"\nPredictions identical: {same}; memory {results['nodes kept'][2] / results['pruned'][2]:.1f}x smaller")
@@ -0,0 +1,101 @@
+# modelLoading.py
+# Run from backend/:  python -m benchmarks.modelLoading [--trees 600]
+import argparse
+import copy
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import joblib
+import utility.generatePatientData as GPD
+from treeUtility import decisionTree, modelFile, node, randomForest
+
+HORIZONS = ["1-year", "2-year", "5-year", "10-year"]
+
+# Runs in a fresh interpreter: load the four models, predict one row, report time and memory
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+mode, model_dir = sys.argv[1], sys.argv[2]
+if mode == "pickle":
+    import joblib
+    models = {year: joblib.load(f"{model_dir}/{year}_model.pkl") for year in %r}
+else:
+    from treeUtility import modelFile
+    models = modelFile.load_models(f"{model_dir}/forest.bin")
+for model in models.values():
+    model.predict([[180.0, 120.0, 50, 100.0, 26.0]])
+elapsed = time.perf_counter() - start
+status = dict(line.split(":", 1) for line in open("/proc/self/status") if ":" in line)
+kb = lambda key: int(status.get(key, "0 kB").split()[0])
+print(json.dumps({"seconds": elapsed, "rss_mb": kb("VmRSS") / 1024, "anon_mb": kb("RssAnon") / 1024,
+                  "file_mb": kb("RssFile") / 1024}))
+""" % HORIZONS
+
+def train_models(n_trees, num_patients):
+    """Train one forest per horizon on generated data (exact mode, like the production forests)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=num_patients, output_dir=tmp, seed=0)
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+    models = {}
+    for year in HORIZONS:
+        print(f"Training {n_trees} trees for {year}...")
+        model = randomForest.RandomForest(n_trees=n_trees, max_depth=40, min_samples_split=3,
+                                          n_jobs=-1, random_state=0)
+        model.fit(X, labels_df[year].to_numpy())
+        models[year] = model
+    return models
+
+def node_graph(table, index):
+    """Rebuild the Node objects of the tree at `index` of a node table."""
+    if table.feature[index] < 0:
+        return node.Node(value=table.value[index].tolist())
+    return node.Node(int(table.feature[index]), float(table.threshold[index]),
+                     node_graph(table, table.left[index]), node_graph(table, table.right[index]))
+
+def as_node_pickle(model):
+    """
+    Copy of a fitted forest in the layout pickles had before the model file: one
+    Node graph per tree and no packed table (rebuilt by compile after loading).
+    """
+    legacy = copy.copy(model)
+    legacy.trees = []
+    for root in model.roots:
+        tree = decisionTree.DecisionTree(max_depth=model.max_depth, min_samples_split=model.min_samples_split, keep_nodes=True)
+        tree.root = node_graph(model.packed, root)
+        legacy.trees.append(tree)
+    legacy.packed = legacy.roots = None
+    return legacy
+
+def cold_start(mode, model_dir):
+    """Load the models in a new process and return its timing/memory report."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    out = subprocess.run([sys.executable, "-c", CHILD, mode, model_dir], cwd=backend_dir,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold start and memory: joblib pickles vs memory-mapped model file")
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    models = train_models(args.trees, args.patients)
+    with tempfile.TemporaryDirectory() as model_dir:
+        for year, model in models.items():
+            joblib.dump(as_node_pickle(model), os.path.join(model_dir, f"{year}_model.pkl"))
+        modelFile.save_models(models, os.path.join(model_dir, "forest.bin"))
+
+        pickle_mb = sum(os.path.getsize(os.path.join(model_dir, f"{year}_model.pkl")) for year in HORIZONS) / 2**20
+        binary_mb = os.path.getsize(os.path.join(model_dir, "forest.bin")) / 2**20
+        print("\npickle: joblib pickles of Node-graph trees (the format before forest.bin); binary: forest.bin")
+        print(f"On disk: pickles {pickle_mb:.1f} MB, model file {binary_mb:.1f} MB")
+
+        print(f"\n{'format':>8} {'cold start s':>13} {'RSS MB':>8} {'private MB':>11} {'file-backed MB':>15}")
+        for mode in ("pickle", "binary"):
+            reports = [cold_start(mode, model_dir) for _ in range(args.runs)]
+            best = min(reports, key=lambda report: report["seconds"])
+            print(f"{mode:>8} {best['seconds']:>13.3f} {best['rss_mb']:>8.1f} {best['anon_mb']:>11.1f} {best['file_mb']:>15.1f}")
+        print("\nFile-backed pages of the model file are shared by every process that maps it.")
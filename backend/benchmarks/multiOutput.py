@@ -0,0 +1,63 @@
+# multiOutput.py
+# Run from backend/:  python -m benchmarks.multiOutput --patients 10000 --trees 50
+import argparse
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import randomForest
+
+def run(num_patients, n_trees, max_depth, max_bins, seed=0):
+    """
+    Train one forest per horizon and one multi-output forest on the same split.
+    Returns per-horizon test accuracy plus fit and batch predict time for each setup.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=num_patients, output_dir=tmp, seed=seed)
+
+    horizons = [col for col in labels_df.columns if col != "patient_id"]
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+    Y = labels_df[horizons].to_numpy()
+    idx = np.random.default_rng(seed).permutation(len(X))
+    split = int(len(X) * 0.8)
+    train_idx, test_idx = idx[:split], idx[split:]
+    params = {"n_trees": n_trees, "max_depth": max_depth, "min_samples_split": 3, "max_bins": max_bins}
+
+    start = time.time()
+    models = {}
+    for i, horizon in enumerate(horizons):
+        models[horizon] = randomForest.RandomForest(random_state=seed + i, **params)
+        models[horizon].fit(X[train_idx], Y[train_idx, i])
+    fit_time = time.time() - start
+    start = time.time()
+    preds = np.stack([models[horizon].predict(X[test_idx]) for horizon in horizons], axis=1)
+    predict_time = time.time() - start
+    results = {"per-horizon": (np.mean(preds == Y[test_idx], axis=0), fit_time, predict_time)}
+
+    start = time.time()
+    model = randomForest.RandomForest(random_state=seed, **params)
+    model.fit(X[train_idx], Y[train_idx])
+    fit_time = time.time() - start
+    start = time.time()
+    preds = model.predict(X[test_idx])
+    predict_time = time.time() - start
+    results["multi-output"] = (np.mean(preds == Y[test_idx], axis=0), fit_time, predict_time)
+    return horizons, results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-horizon forests vs one multi-output forest")
+    parser.add_argument("--patients", type=int, nargs="+", default=[10000])
+    parser.add_argument("--trees", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=40)
+    parser.add_argument("--max-bins", type=int, default=None)
+    args = parser.parse_args()
+
+    for n in args.patients:
+        horizons, results = run(n, args.trees, args.max_depth, args.max_bins)
+        print(f"\n{n} patients, {args.trees} trees per forest")
+        print(f"{'setup':>14} " + " ".join(f"{h:>8}" for h in horizons) + f" {'fit':>9} {'predict':>9}")
+        for setup, (accs, fit_time, predict_time) in results.items():
+            print(f"{setup:>14} " + " ".join(f"{acc * 100:>7.2f}%" for acc in accs) +
+                  f" {fit_time:>8.2f}s {predict_time:>8.3f}s")
+        per, multi = results["per-horizon"], results["multi-output"]
+        print(f"{'':>14} speedup: fit {per[1] / multi[1]:.1f}x, predict {per[2] / multi[2]:.1f}x")
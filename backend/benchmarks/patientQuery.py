@@ -0,0 +1,85 @@
+# patientQuery.py
+# Run from backend/:  python -m benchmarks.patientQuery [--sizes 10000 100000 1000000]
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from utility.patientStore import PatientStore
+
+QUERIES = {
+    "first page": dict(),
+    "page 20, bmi desc": dict(page=20, sort_by="bmi", sort_dir="desc"),
+    "age 40-60, glucose": dict(min_age=40, max_age=60, sort_by="glucose"),
+    "q=12": dict(q="12"),
+}
+
+def legacy_query(rows, page=1, page_size=50, q=None, min_age=None, max_age=None, min_bmi=None, max_bmi=None,
+                 sort_by="patient_id", sort_dir="asc"):
+    """The per-row filter + full sort that GET /patients used before the columnar store."""
+    def passes(r):
+        if min_age is not None and r["age"] < min_age: return False
+        if max_age is not None and r["age"] > max_age: return False
+        if min_bmi is not None and r["bmi"] < min_bmi: return False
+        if max_bmi is not None and r["bmi"] > max_bmi: return False
+        if q:
+            ql = q.lower()
+            if ql.isdigit():
+                if str(r["patient_id"]).find(ql) == -1 and str(r["age"]).find(ql) == -1:
+                    return False
+            elif ql not in str(r["patient_id"]).lower():
+                return False
+        return True
+
+    filtered = [r for r in rows if passes(r)]
+    filtered.sort(key=lambda x: float(x[sort_by]), reverse=(sort_dir == "desc"))
+    start = (page - 1) * page_size
+    return len(filtered), filtered[start:start + page_size]
+
+def store_query(store, page=1, page_size=50, q=None, min_age=None, max_age=None, min_bmi=None, max_bmi=None,
+                sort_by="patient_id", sort_dir="asc"):
+    """Same query through PatientStore, as GET /patients runs it."""
+    data = store.refresh()
+    mask = store.filter_mask(q, min_age, max_age, min_bmi, max_bmi, data=data)
+    start = (page - 1) * page_size
+    return store.page(mask, sort_by, sort_dir == "desc", start, start + page_size, data=data)
+
+def write_patients(num_patients, path):
+    """Write a patients.csv of num_patients rows, resampled from a generated base set."""
+    with tempfile.TemporaryDirectory() as tmp:
+        base_df, _ = GPD.generate_data(num_patients=min(num_patients, 10000), output_dir=tmp, seed=0)
+    idx = np.random.default_rng(0).integers(0, len(base_df), num_patients)
+    patients_df = base_df.iloc[idx].reset_index(drop=True)
+    patients_df["patient_id"] = np.arange(1, num_patients + 1)
+    patients_df.to_csv(path, index=False)
+
+def timed(fn, repeat):
+    """Median wall time of fn in milliseconds, and its last result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return np.median(times), result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="GET /patients query cost: legacy per-row path vs PatientStore")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"\n{'patients':>9} {'query':>20} {'legacy ms':>10} {'store ms':>9} {'speedup':>8}")
+    for n in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "patients.csv")
+            write_patients(n, path)
+            store = PatientStore(path)
+            rows = store.rows()
+
+            for name, params in QUERIES.items():
+                store_query(store, **params)  # build cached sort orders once, like a warm server
+                legacy_ms, expected = timed(lambda: legacy_query(rows, **params), max(1, args.repeat // 2))
+                store_ms, result = timed(lambda: store_query(store, **params), args.repeat)
+                assert result == expected, f"results differ for {name!r}"
+                print(f"{n:>9} {name:>20} {legacy_ms:>10.2f} {store_ms:>9.2f} {legacy_ms / store_ms:>7.1f}x")
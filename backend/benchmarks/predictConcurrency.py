@@ -0,0 +1,72 @@
+# predictConcurrency.py
+# Run from backend/:  python -m benchmarks.predictConcurrency --requests 2000 --concurrency 64
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from utility.patientManagementSystem import MainModule
+from utility.predictionBatcher import PredictionBatcher
+
+FIELDS = ["cholesterol", "blood_pressure", "age", "glucose", "bmi"]
+
+async def run_load(api_server, rows, warmup, concurrency):
+    """POST every row to /predict with `concurrency` requests in flight; returns (seconds, latencies)."""
+    import httpx
+    latencies = []
+    pending = iter(rows)
+
+    async def client_loop(client):
+        for row in pending:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=dict(zip(FIELDS, row.tolist())))
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    async with api_server.lifespan(api_server.app):
+        transport = httpx.ASGITransport(app=api_server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            while not (await client.get("/ready")).json()["ready"]:
+                await asyncio.sleep(0.05)
+            # Warm up (worker start, engine hand-off) before timing
+            await asyncio.gather(*[client.post("/predict", json=dict(zip(FIELDS, row.tolist()))) for row in warmup])
+            start = time.perf_counter()
+            await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+            return time.perf_counter() - start, latencies
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/predict throughput under concurrent load: per-request vs micro-batched")
+    parser.add_argument("--patients", type=int, default=10000)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.getcwd())
+    with tempfile.TemporaryDirectory() as workdir:
+        GPD.generate_data(num_patients=args.patients, output_dir=os.path.join(workdir, "data"), seed=0)
+        os.chdir(workdir)
+        # Train and save the models the API will load
+        MainModule("data/patients.csv", "data/labels.csv", forest_params={"n_trees": args.trees, "max_bins": 255})
+        import api_server
+
+        # Distinct rows, so the prediction cache never answers
+        rng = np.random.default_rng(1)
+        rows = rng.uniform([120, 90, 20, 70, 16], [320, 200, 80, 300, 50], size=(args.requests + args.concurrency, 5))
+        rows = rows.round(2)
+
+        setups = {
+            "per request": PredictionBatcher(max_batch=1, max_wait=0, workers=0),
+            "batched, thread": PredictionBatcher(max_batch=64, max_wait=0.002, workers=0),
+            "batched, process": PredictionBatcher(max_batch=64, max_wait=0.002, workers=1),
+        }
+        print(f"\n{'setup':>17} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, batcher in setups.items():
+            api_server.batcher = batcher
+            api_server.system.prediction_cache.clear()
+            elapsed, latencies = asyncio.run(run_load(api_server, rows[:args.requests], rows[args.requests:], args.concurrency))
+            print(f"{name:>17} {len(latencies) / elapsed:>8.0f} {np.percentile(latencies, 50) * 1000:>8.2f} "
+                  f"{np.percentile(latencies, 99) * 1000:>8.2f}")
@@ -0,0 +1,79 @@
+# predictLatency.py
+# Run from backend/:  python -m benchmarks.predictLatency [--model-dir models]
+import argparse
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import randomForest, forestEngine
+from utility.streamScoring import load_saved_models
+
+HORIZONS = ["1-year", "2-year", "5-year", "10-year"]
+
+# Latency budgets in milliseconds for all four horizons: (p50, p99)
+TARGETS = {
+    "single": (5.0, 15.0),
+    "batch": (400.0, 800.0),
+}
+
+def load_or_train_models(model_dir, n_trees, X, labels_df):
+    """Use the saved horizon models (forest.bin, or older pickles) if present; otherwise train small forests for the run."""
+    models = load_saved_models(model_dir)
+    if all(year in models for year in HORIZONS):
+        print(f"Using saved models from {model_dir}/")
+        return {year: models[year] for year in HORIZONS}
+
+    print(f"No saved models in {model_dir}/, training {n_trees} trees per horizon...")
+    models = {}
+    for year in HORIZONS:
+        model = randomForest.RandomForest(n_trees=n_trees, max_depth=40, min_samples_split=3, random_state=0)
+        model.fit(X, labels_df[year].to_numpy())
+        models[year] = model
+    return models
+
+def measure(fn, inputs):
+    """Call fn on every input; return (p50, p99) latency in milliseconds."""
+    times = []
+    for x in inputs:
+        start = time.perf_counter()
+        fn(x)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, 50), np.percentile(times, 99)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latency of per-model predict vs the packed ForestEngine")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--trees", type=int, default=100, help="trees per horizon when no saved models exist")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=5000, output_dir=tmp, seed=0)
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+
+    models = load_or_train_models(args.model_dir, args.trees, X, labels_df)
+    engine = forestEngine.ForestEngine(models)
+
+    rng = np.random.default_rng(0)
+    singles = [X[i] for i in rng.integers(0, len(X), args.requests)]
+    batches = [X[rng.integers(0, len(X), args.batch_size)] for _ in range(max(args.requests // 10, 5))]
+
+    cases = {
+        "single": {
+            "per-model": measure(lambda x: [model.predict([x]) for model in models.values()], singles),
+            "engine": measure(engine.predict_one, singles),
+        },
+        "batch": {
+            "per-model": measure(lambda b: [model.predict(b) for model in models.values()], batches),
+            "engine": measure(engine.predict, batches),
+        },
+    }
+
+    print(f"\n{'case':>10} {'path':>10} {'p50 ms':>9} {'p99 ms':>9}   target (p50/p99)")
+    for case, paths in cases.items():
+        p50_target, p99_target = TARGETS[case]
+        for path, (p50, p99) in paths.items():
+            status = "ok" if p50 <= p50_target and p99 <= p99_target else "OVER"
+            label = case if case == "single" else f"{case}[{args.batch_size}]"
+            print(f"{label:>10} {path:>10} {p50:>9.2f} {p99:>9.2f}   {p50_target}/{p99_target} {status}")
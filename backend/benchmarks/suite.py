@@ -0,0 +1,176 @@
+# suite.py
+# Run from backend/:  python -m benchmarks.suite [--sizes 1000 10000 100000] [--save-baseline]
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import decisionTree, randomForest
+from utility.patientManagementSystem import MainModule
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.join(BACKEND_DIR, "benchmarks")
+
+# (n_trees, max_depth, max_bins) for the RandomForest.fit cases; the last one also serves the predict cases
+FOREST_CONFIGS = [(10, 10, None), (10, 40, None), (25, 40, 255)]
+# Forests MainModule trains on a cold start without saved models (production uses 600 exact trees)
+COLD_START_FOREST = {"n_trees": 25, "max_bins": 255}
+# Changes smaller than this many seconds are timer noise, whatever the ratio
+NOISE_FLOOR = 0.0005
+
+def timed(fn, repeat=1):
+    """Median wall time of fn() in seconds over repeat calls."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def bench_size(num_patients, repeat, workdir):
+    """Run every case on a generated dataset of num_patients; returns {case: seconds}."""
+    results = {}
+    data_dir = os.path.join(workdir, "data")
+    results["generate_data"] = timed(lambda: GPD.generate_data(num_patients=num_patients, output_dir=data_dir, seed=0))
+    patients_df, labels_df = GPD.generate_data(num_patients=num_patients, output_dir=data_dir, seed=0)
+
+    X = patients_df.drop(columns=["patient_id"]).to_numpy()
+    y = labels_df["5-year"].to_numpy()
+    idx = np.random.default_rng(0).permutation(len(X))
+    split = int(len(X) * 0.8)
+    X_train, y_train, X_test = X[idx[:split]], y[idx[:split]], X[idx[split:]]
+
+    results["decision_tree.fit"] = timed(
+        lambda: decisionTree.DecisionTree(max_depth=40, min_samples_split=3).fit(X_train, y_train, rng=np.random.default_rng(0)))
+
+    for n_trees, max_depth, max_bins in FOREST_CONFIGS:
+        model = randomForest.RandomForest(n_trees=n_trees, max_depth=max_depth, min_samples_split=3,
+                                          max_bins=max_bins, random_state=0)
+        bins = f",bins={max_bins}" if max_bins else ""
+        results[f"random_forest.fit[trees={n_trees},depth={max_depth}{bins}]"] = timed(lambda: model.fit(X_train, y_train))
+
+    rows = X_test[:repeat * 10]
+    results["random_forest.predict[single]"] = timed(lambda: [model.predict(row[None]) for row in rows]) / len(rows)
+    batch = X_test[:1000]
+    results[f"random_forest.predict[batch={len(batch)}]"] = timed(lambda: model.predict(batch), repeat)
+
+    # MainModule and the API resolve data/ and models/ against the working directory
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        paths = ("data/patients.csv", "data/labels.csv")
+        results["main_module.cold_start[train]"] = timed(lambda: MainModule(*paths, forest_params=COLD_START_FOREST))
+        results["main_module.cold_start[load]"] = timed(lambda: MainModule(*paths), repeat)
+        results.update(bench_api(X_test, repeat))
+    finally:
+        os.chdir(cwd)
+    return results
+
+def bench_api(X_test, repeat):
+    """Time each api_server endpoint through a TestClient (skipped when httpx is not installed)."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError as exc:
+        print(f"  skipping API cases ({exc})")
+        return {}
+
+    # Re-import so the module-level store and MainModule read this size's data
+    api_server = importlib.reload(sys.modules["api_server"]) if "api_server" in sys.modules else importlib.import_module("api_server")
+    patient = dict(zip(["cholesterol", "blood_pressure", "age", "glucose", "bmi"], X_test[0].tolist()))
+    batch = {"patients": [dict(zip(patient, row.tolist())) for row in X_test[:1000]]}
+
+    cases = {
+        "POST /predict": lambda client: client.post("/predict", json=patient),
+        f"POST /predict/batch[{len(batch['patients'])}]": lambda client: client.post("/predict/batch", json=batch),
+        "GET /ready": lambda client: client.get("/ready"),
+        "GET /patients": lambda client: client.get("/patients"),
+        "GET /patients[filter,sort]": lambda client: client.get(
+            "/patients", params={"q": "1", "min_age": 40, "sort_by": "glucose", "sort_dir": "desc"}),
+        "GET /patients/stats": lambda client: client.get("/patients/stats"),
+        "GET /patients/{id}": lambda client: client.get("/patients/1"),
+        "GET /metrics": lambda client: client.get("/metrics"),
+    }
+
+    results = {}
+    with TestClient(api_server.app) as client:
+        # /ready always answers 200; wait until every horizon model is serving
+        while not (ready := client.get("/ready").json())["ready"]:
+            if "failed" in ready["horizons"].values():
+                raise RuntimeError(f"model loading failed: {ready['horizons']}")
+            time.sleep(0.05)
+        for name, call in cases.items():
+            response = call(client)
+            if response.status_code != 200:
+                raise RuntimeError(f"{name} returned {response.status_code}: {response.text[:200]}")
+            results[f"api.{name}"] = timed(lambda: call(client), repeat)
+    return results
+
+def compare(results, baseline, threshold):
+    """Print current vs baseline per case; return the cases slower than baseline by more than threshold."""
+    regressions = []
+    print(f"\n{'case':<58} {'baseline':>10} {'current':>10} {'change':>8}")
+    for size, cases in results.items():
+        for case, seconds in cases.items():
+            base = baseline.get(size, {}).get(case)
+            if base is None:
+                print(f"{size + ' ' + case:<58} {'-':>10} {seconds * 1000:>8.2f}ms {'new':>8}")
+                continue
+            change = seconds / base - 1 if base else 0.0
+            flag = change > threshold and seconds - base > NOISE_FLOOR
+            if flag:
+                regressions.append(f"{size} {case}")
+            print(f"{size + ' ' + case:<58} {base * 1000:>8.2f}ms {seconds * 1000:>8.2f}ms {change:>+7.0%}"
+                  + ("  REGRESSION" if flag else ""))
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time training, inference, cold start and API endpoints")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=20, help="calls per fast case (the median is kept)")
+    parser.add_argument("--output", default=os.path.join(BENCH_DIR, "results.json"))
+    parser.add_argument("--baseline", default=os.path.join(BENCH_DIR, "baseline.json"))
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    results = {}
+    for n in args.sizes:
+        print(f"\n=== {n} patients ===")
+        with tempfile.TemporaryDirectory() as workdir:
+            results[str(n)] = bench_size(n, args.repeat, workdir)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for case in regressions:
+                print(f"  {case}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
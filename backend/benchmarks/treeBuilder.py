@@ -0,0 +1,49 @@
+# treeBuilder.py
+# Run from backend/:  python -m benchmarks.treeBuilder --patients 100000 --trees 5
+import argparse
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import utility.generatePatientData as GPD
+from treeUtility import decisionTree, randomForest
+
+def fit_trees(X, y, n_trees, max_depth, shared):
+    """
+    Fit n_trees bootstrap trees; shared passes the sample as draw counts over X and one
+    presorted index, otherwise every tree gets copied rows. Returns (seconds, peak bytes per tree).
+    """
+    presorted = randomForest.presort(X) if shared else None
+    elapsed, peak = 0.0, 0
+    for seed in np.random.SeedSequence(0).spawn(n_trees):
+        rng = np.random.default_rng(seed)
+        idxs = randomForest.RandomForest.bootstrap_indices(len(X), rng)
+        tree = decisionTree.DecisionTree(max_depth=max_depth, min_samples_split=3)
+        tracemalloc.start()
+        start = time.perf_counter()
+        if shared:
+            tree.fit(X, y, rng=rng, sample_counts=np.bincount(idxs, minlength=len(X)), presorted=presorted)
+        else:
+            tree.fit(X[idxs], y[idxs], rng=rng)
+        elapsed += time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tree building: copied bootstrap rows vs draw counts over a shared X")
+    parser.add_argument("--patients", type=int, default=100000)
+    parser.add_argument("--trees", type=int, default=5)
+    parser.add_argument("--max-depth", type=int, default=40)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        patients_df, labels_df = GPD.generate_data(num_patients=args.patients, output_dir=tmp, seed=0)
+    X = randomForest.StandardScaler().fit_transform(patients_df.drop(columns=["patient_id"]).to_numpy())
+    y = labels_df["5-year"].to_numpy()
+
+    print(f"\n{'bootstrap':>14} {'s/tree':>8} {'peak MB/tree':>13}")
+    for name, shared in (("copied rows", False), ("counts over X", True)):
+        elapsed, peak = fit_trees(X, y, args.trees, args.max_depth, shared)
+        print(f"{name:>14} {elapsed / args.trees:>8.2f} {peak / 2**20:>13.1f}")
+    print(f"\nX itself: {X.nbytes / 2**20:.1f} MB")
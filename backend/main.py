@@ -19,7 +19,7 @@ if __name__ == "__main__":
         patient_data = file_path + "patients.csv"
         label_data = file_path + "labels.csv"
     # Step 2: Initialize system
-    system = PMS.MainModule(patient_data, label_data)
+    system = PMS.MainModule(patient_data, label_data, n_jobs=-1)
 
     # Step 3: Evaluate on unseen data
     system.evaluate()
@@ -0,0 +1,22 @@
+# score.py
+# Stream-score a patient file with the saved horizon models:
+#   python score.py data/patients.csv predictions.csv --chunk-size 50000
+import argparse
+import sys
+import utility.streamScoring as SS
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score a patients CSV in fixed-size blocks and write predictions incrementally")
+    parser.add_argument("patient_csv", help="CSV with cholesterol, blood_pressure, age, glucose, bmi (patient_id optional)")
+    parser.add_argument("output_csv", help="where to write patient_id + one label column per horizon")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per block (bounds peak memory)")
+    parser.add_argument("--model-dir", default="models")
+    args = parser.parse_args()
+
+    models = SS.load_saved_models(args.model_dir)
+    if not models:
+        sys.exit(f"No saved models in {args.model_dir}/ — run main.py first to train them.")
+
+    print(f"Scoring {args.patient_csv} with {', '.join(models)} models...")
+    rows, seconds = SS.score_file(args.patient_csv, args.output_csv, models, chunk_size=args.chunk_size)
+    print(f"\nWrote {rows:,} predictions to {args.output_csv} in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s)")
@@ -1,7 +1,6 @@
 # decisionTree.py
 import numpy as np
-from collections import Counter
-from treeUtility import node
+from treeUtility import node, flatTree
 
 # DECISION TREE CLASS
 class DecisionTree:
@@ -11,102 +10,303 @@ class DecisionTree:
       - max_depth: maximum depth allowed for recursion
       - n_features: number of random features to consider at each split (used for randomness)   
       - criterion: "gini" or "entropy" (Choosing which impurity algorithm)
+      - bin_edges: set during fit when X is a pre-binned uint8 matrix (histogram mode)
+      - rng: set during fit to the tree's own np.random.Generator (global np.random if not given)
+      - n_outputs: number of label columns; a 2D y trains a multi-output tree whose
+        splits minimize the mean impurity over all columns and whose leaves hold one
+        label per column
+      - prune: after growing, collapse splits whose two children are leaves with the
+        same label (predictions are unchanged, the tree gets smaller)
+      - keep_nodes: keep the Node graph after fit; by default only the compiled
+        FlatTree arrays are kept, which take a fraction of the memory
 
+    Training never copies X: nodes are ranges of a per-tree buffer of row indices
+    (one row per feature, each kept sorted by that feature in exact mode) that is
+    partitioned in place at every split.
+
+    In histogram mode a node's (feature, bin, class) histogram is built only for the
+    smaller child of a split; the sibling's is the parent's minus it. Nodes with
+    fewer rows than bins skip histograms and sort their few rows instead.
     """
-    def __init__(self, min_samples_split=2, max_depth=100, n_features=None, criterion="gini"):
+    def __init__(self, min_samples_split=2, max_depth=100, n_features=None, criterion="gini",
+                 prune=True, keep_nodes=False):
         self.min_samples_split = min_samples_split
         self.max_depth = max_depth
         self.n_features = n_features
         self.criterion = criterion
+        self.prune = prune
+        self.keep_nodes = keep_nodes
         self.root = None 
+        self.flat = None
+        self.bin_edges = None
+        self.n_bins = None
+        self.rng = None
+        self.n_outputs = 1
+        self.class_offsets = None
+        self.X = None
+        self.y = None
+        self.counts = None
+        self.index = None
+        self.go_left = None
 
-    def fit(self, X, y):
+    def fit(self, X, y, bin_edges=None, rng=None, sample_counts=None, presorted=None):
         """
         Fit (train) the decision tree using dataset X (features) and y (labels).
+
+        If bin_edges is given, X holds bin indices (see RandomForest.max_bins) and splits
+        are picked from per-bin class histograms. Node thresholds are stored as the bin's
+        upper edge, so the fitted tree predicts on real feature values either way.
+        rng draws the random feature subsets; pass a seeded Generator for reproducible trees.
+        y may be (n_samples,) or (n_samples, n_outputs) for a multi-output tree.
+
+        sample_counts gives how many times each row of X is drawn (a bootstrap sample as
+        counts rather than copied rows); rows with count 0 are left out and every count
+        is used as a weight. presorted is np.argsort(X, axis=0, kind="stable"), which
+        exact mode needs; pass it to share one sort between the trees of a forest.
         """
         self.n_features = X.shape[1] if self.n_features is None else min(X.shape[1], self.n_features)
-        self.root = self.grow_tree(X, y)
+        self.bin_edges = bin_edges
+        self.rng = np.random if rng is None else rng
+        if bin_edges is not None:
+            self.n_bins = max(len(edges) for edges in bin_edges) + 1
+
+        # Labels are grown as codes into one shared class axis: output j's classes
+        # occupy columns class_offsets[j]..class_offsets[j + 1] of every count matrix
+        y = np.asarray(y)
+        self.n_outputs = 1 if y.ndim == 1 else y.shape[1]
+        y = y.reshape(len(y), self.n_outputs).astype(np.intp)
+        counts = np.ones(len(y), dtype=np.intp) if sample_counts is None else np.asarray(sample_counts)
+        self.class_offsets = np.concatenate(([0], np.cumsum(y[counts > 0].max(axis=0) + 1)))
+        self.X = X
+        self.y = y + self.class_offsets[:-1]
+        self.counts = counts
+
+        # Index buffer: exact mode keeps one row of in-sample indices per feature, sorted by
+        # that feature, so split search needs no sorting; binned mode needs only one row
+        in_sample = counts > 0
+        if bin_edges is None:
+            order = np.argsort(X, axis=0, kind="stable") if presorted is None else presorted
+            self.index = np.stack([column[in_sample[column]] for column in order.T])
+        else:
+            self.index = np.flatnonzero(in_sample)[None, :]
+        self.go_left = np.zeros(len(y), dtype=bool)
 
-    def grow_tree(self, X, y, depth=0):
-        """Recursively build the tree."""
-        n_samples, n_features = X.shape
-        n_labels = len(np.unique(y))
+        n_rows = self.index.shape[1]
+        hist = self.histogram(self.index[0]) if bin_edges is not None and n_rows >= self.n_bins else None
+        self.root = self.grow_tree(0, n_rows, hist=hist)
+        self.X = self.y = self.counts = self.index = self.go_left = None
+        if self.prune:
+            self.root = self.prune_node(self.root)
+        self.flat = flatTree.FlatTree.from_root(self.root)
+        if not self.keep_nodes:
+            self.root = None
+        self.bin_edges = None
+        self.rng = None
 
-        if (depth >= self.max_depth or n_labels == 1 or n_samples < self.min_samples_split):
-            leaf_value = self.common_label(y)
+    def grow_tree(self, start, end, depth=0, class_counts=None, hist=None):
+        """
+        Recursively build the tree over the samples in index[:, start:end]; class_counts
+        (their weighted counts per class) is passed down by the parent's split search,
+        and in histogram mode so is hist (see histogram) for nodes with at least n_bins rows.
+        """
+        rows = self.index[0, start:end]
+        if class_counts is None:
+            class_counts = self.class_counts(rows).sum(axis=0)
+        n_samples = class_counts[:self.class_offsets[1]].sum()
+        pure = np.count_nonzero(class_counts) == self.n_outputs
+
+        if (depth >= self.max_depth or pure or n_samples < self.min_samples_split):
+            leaf_value = self.common_label(class_counts)
             return node.Node(value=leaf_value)
 
-        feat_idxs = np.random.choice(n_features, self.n_features, replace=False)
+        feat_idxs = self.rng.choice(self.X.shape[1], self.n_features, replace=False)
 
-        best_gain, best_feature, best_threshold = -1, None, None
-        for index in feat_idxs:
-            X_col = X[:, index]
-            thresholds = np.unique(X_col)
-            for threshold in thresholds:
-                IG = self.information_gain(y, X_col, threshold)
-                if IG > best_gain:
-                    best_gain = IG
-                    best_feature = index
-                    best_threshold = threshold
+        if self.bin_edges is None:
+            sorted_rows = self.index[feat_idxs, start:end]
+            best_gain, best_feature, best_threshold, left_counts = self.best_split(sorted_rows, feat_idxs, class_counts)
+            split_value = best_threshold
+        elif hist is None:
+            # Fewer rows than bins: sorting them beats sweeping every bin
+            sorted_rows = rows[np.argsort(self.X[np.ix_(rows, feat_idxs)], axis=0, kind="stable")].T
+            best_gain, best_feature, split_value, left_counts = self.best_split(sorted_rows, feat_idxs, class_counts)
+        else:
+            best_gain, best_feature, split_value, left_counts = self.best_split_binned(hist, feat_idxs, class_counts)
 
         if best_gain == -1:
-            return node.Node(value=self.common_label(y))
+            return node.Node(value=self.common_label(class_counts))
+
+        middle = self.partition(start, end, best_feature, split_value)
+        if middle in (start, end):
+            # No threshold separates these samples (every candidate feature is constant)
+            return node.Node(value=self.common_label(class_counts))
 
-        left_idxs, right_idxs = self.split(X[:, best_feature], best_threshold)
-        left_child = self.grow_tree(X[left_idxs, :], y[left_idxs], depth + 1)
-        right_child = self.grow_tree(X[right_idxs, :], y[right_idxs], depth + 1)
+        if self.bin_edges is not None:
+            best_threshold = self.bin_edges[best_feature][split_value]
+
+        left_hist, right_hist = self.child_histograms(hist, start, middle, end)
+        left_child = self.grow_tree(start, middle, depth + 1, left_counts, left_hist)
+        right_child = self.grow_tree(middle, end, depth + 1, class_counts - left_counts, right_hist)
 
         return node.Node(feature=best_feature, threshold=best_threshold, left=left_child, right=right_child)
 
+    def partition(self, start, end, feature, split_value):
+        """
+        Stable in-place partition of index[:, start:end]: samples with X[:, feature] <= split_value
+        move to the front of every row (which stays sorted). Returns where the right child starts.
+        """
+        rows = self.index[0, start:end]
+        self.go_left[rows] = self.X[rows, feature] <= split_value
+        segment = self.index[:, start:end]
+        left = self.go_left[segment]
+        middle = start + int(np.count_nonzero(left[0]))
+        # Boolean indexing walks row by row, so each row's left (and right) samples stay in order
+        self.index[:, start:middle], self.index[:, middle:end] = (
+            segment[left].reshape(len(segment), -1), segment[~left].reshape(len(segment), -1))
+        return middle
+
+    def histogram(self, rows):
+        """Weighted class counts of rows per (feature, bin), shape (n_features, n_bins, n_classes over all outputs)."""
+        n_features, n_classes = self.X.shape[1], self.class_offsets[-1]
+        # Histogram index = (feature, bin, class), flattened; each row adds its count once per output
+        slots = np.arange(n_features) * self.n_bins + self.X[rows].astype(np.intp)
+        codes = slots[:, :, None] * n_classes + self.y[rows][:, None, :]
+        weights = np.broadcast_to(self.counts[rows][:, None, None], codes.shape)
+        hist = np.bincount(codes.ravel(), weights=weights.ravel(), minlength=n_features * self.n_bins * n_classes)
+        return hist.astype(np.int64).reshape(n_features, self.n_bins, n_classes)
 
-    def information_gain(self, y, X_column, threshold):
-        """Compute information gain using Gini or Entropy."""
-        if self.criterion == "entropy":
-            impurity_func = self.calculate_entropy
+    def child_histograms(self, hist, start, middle, end):
+        """
+        Histograms of the children index[:, start:middle] and index[:, middle:end]: only the
+        smaller one is counted, the other is hist minus it. Children with fewer than n_bins
+        rows get None (they sort their rows instead); so do both when hist is None.
+        """
+        n_left, n_right = middle - start, end - middle
+        if hist is None or max(n_left, n_right) < self.n_bins:
+            return None, None
+        if n_left <= n_right:
+            left = self.histogram(self.index[0, start:middle])
+            right = hist - left
         else:
-            impurity_func = self.calculate_gini
+            right = self.histogram(self.index[0, middle:end])
+            left = hist - right
+        return (left if n_left >= self.n_bins else None), (right if n_right >= self.n_bins else None)
+
+    def class_counts(self, rows):
+        """Weighted one-hot labels of rows, shape (len(rows), n_classes over all outputs)."""
+        one_hot = np.zeros((len(rows), self.class_offsets[-1]), dtype=np.int64)
+        one_hot[np.arange(len(rows))[:, None], self.y[rows]] = self.counts[rows][:, None]
+        return one_hot
+
+
+    def prune_node(self, node):
+        """Bottom-up: replace a split by its left leaf when both children are leaves with the same label."""
+        if node.value is not None:
+            return node
+        node.left = self.prune_node(node.left)
+        node.right = self.prune_node(node.right)
+        if node.left.value is not None and node.right.value is not None and \
+                np.array_equal(node.left.value, node.right.value):
+            return node.left
+        return node
 
-        parent_impurity = impurity_func(y)
-        left_idxs, right_idxs = self.split(X_column, threshold)
+    def best_split(self, rows, feat_idxs, class_counts):
+        """
+        Find the best (gain, feature, threshold, left class counts) over the candidate features.
+
+        rows holds the node's samples sorted by each candidate feature, one row per
+        feature (the index buffer in exact mode, a local sort for small binned nodes,
+        where thresholds are bins). The class counts are swept with a cumulative sum,
+        so every threshold of every candidate feature is scored in one vectorized pass
+        instead of once per unique value. Ties go to the first feature in feat_idxs,
+        then the smallest threshold.
+        """
+        n = class_counts[:self.class_offsets[1]].sum()
+        parent_impurity = self.information_impurity(class_counts[None, :], np.array([n]))[0]
+        if len(feat_idxs) == 0:
+            return -1, None, None, None
+
+        sorted_cols = self.X[rows, feat_idxs[:, None]]
+        cum_counts = np.cumsum(self.class_counts(rows.ravel()).reshape(rows.shape + (-1,)), axis=1)
+
+        # Last position of each run of equal values: threshold <= value puts the whole run on the left.
+        # The largest unique value is a candidate too; it leaves the right side empty, which scores 0 gain
+        ends = np.ones(rows.shape, dtype=bool)
+        ends[:, :-1] = sorted_cols[:, 1:] != sorted_cols[:, :-1]
+        slots, positions = np.nonzero(ends)
+        split = positions < rows.shape[1] - 1
+
+        left_counts = cum_counts[slots, positions]
+        n_left = left_counts[:, :self.class_offsets[1]].sum(axis=1)
+        gains = np.zeros(len(slots))
+        gains[split] = self.split_gains(parent_impurity, left_counts[split], class_counts - left_counts[split],
+                                        n_left[split], n - n_left[split], n)
+
+        # nonzero is row-major, so argmax keeps the first feature, then the smallest threshold
+        i = np.argmax(gains)
+        return gains[i], feat_idxs[slots[i]], sorted_cols[slots[i], positions[i]], left_counts[i]
+
+    def best_split_binned(self, hist, feat_idxs, total_counts):
+        """
+        Histogram version of best_split for a binned X: returns (gain, feature, bin, left class counts).
+
+        hist is the node's class counts per (feature, bin) (see histogram), so the cost
+        depends on the number of bins rather than the number of rows. Only splits with
+        samples on both sides are scored; if there are none, gain is -1.
+        """
+        n_classes = self.class_offsets[-1]
+        n_bins = self.n_bins
+        n = total_counts[:self.class_offsets[1]].sum()
+        parent_impurity = self.information_impurity(total_counts[None, :], np.array([n]))[0]
 
-        if len(left_idxs) == 0 or len(right_idxs) == 0:
-            return 0
+        left_counts = np.cumsum(hist[feat_idxs], axis=1).reshape(-1, n_classes)
+        n_left = left_counts[:, :self.class_offsets[1]].sum(axis=1)
 
-        n = len(y)
-        n_left, n_right = len(left_idxs), len(right_idxs)
-        child_impurity = (n_left / n) * impurity_func(y[left_idxs]) + (n_right / n) * impurity_func(y[right_idxs])
+        # Bin b sends bins 0..b left; skip bins that leave either side empty
+        candidates = np.flatnonzero((n_left > 0) & (n_left < n))
+        if len(candidates) == 0:
+            return -1, None, None, None
 
+        left_counts = left_counts[candidates]
+        n_left = n_left[candidates]
+        gains = self.split_gains(parent_impurity, left_counts, total_counts - left_counts, n_left, n - n_left, n)
+
+        # Row-major order keeps ties on the first feature, then the smallest bin
+        i = np.argmax(gains)
+        slot, best_bin = divmod(candidates[i], n_bins)
+        return gains[i], feat_idxs[slot], best_bin, left_counts[i]
+
+    def split_gains(self, parent_impurity, left_counts, right_counts, n_left, n_right, n):
+        """Information gain of every candidate split given its left/right class counts."""
+        child_impurity = (n_left / n) * self.information_impurity(left_counts, n_left) + \
+                         (n_right / n) * self.information_impurity(right_counts, n_right)
         return parent_impurity - child_impurity
 
-    def split(self, X_column, split_threshold):
-        """Split dataset based on threshold."""
-        left_idxs = np.argwhere(X_column <= split_threshold).flatten()
-        right_idxs = np.argwhere(X_column > split_threshold).flatten()
-        return left_idxs, right_idxs
-    
-    def calculate_gini(self, y):
-        """Calculate gini of label distribution. (More efficient and foregoes Logorithms)"""
-        ps = np.bincount(y) / len(y)
-        return 1 - np.sum(ps ** 2)
-
-    def calculate_entropy(self, y):
-        """Calculate entropy of label distribution."""
-        ps = np.bincount(y) / len(y)
-        return -np.sum([p * np.log(p) for p in ps if p > 0])
-
-    def common_label(self, y):
-        """Return most frequent class label."""
-        return Counter(y).most_common(1)[0][0]
+    def information_impurity(self, counts, totals):
+        """
+        Gini or Entropy for each row of a (n_splits, n_classes) class-count matrix.
+        For multi-output trees the row holds every output's counts and the result is
+        the mean impurity over the outputs.
+        """
+        ps = counts / totals[:, None]
+        if self.criterion == "entropy":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                terms = np.where(ps > 0, ps * np.log(ps), 0.0)
+            return -np.sum(terms, axis=1) / self.n_outputs
+        return 1 - np.sum(ps ** 2, axis=1) / self.n_outputs
 
-    def predict(self, X):
-        """Predict class labels for all samples in X."""
-        return np.array([self.traverse(x, self.root) for x in X])
+    def common_label(self, class_counts):
+        """
+        Return most frequent class label given a node's class counts (an array with one
+        label per output for multi-output trees); ties go to the lowest label.
+        """
+        labels = [int(np.argmax(class_counts[low:high])) for low, high in zip(self.class_offsets[:-1], self.class_offsets[1:])]
+        return labels[0] if self.n_outputs == 1 else np.array(labels)
 
-    def traverse(self, x, node):
-        """Traverse the tree recursively for prediction."""
-        if node.value is not None:
-            return node.value
-        if x[node.feature] <= node.threshold:
-            return self.traverse(x, node.left)
-        else:
-            return self.traverse(x, node.right)
\ No newline at end of file
+    def predict(self, X):
+        """Predict class labels for all samples in X (batched traversal of the compiled tree), shape (n_samples,) or (n_samples, n_outputs)."""
+        if getattr(self, "flat", None) is None:
+            if self.root is None:
+                raise ValueError("tree arrays were moved into its forest's node table; predict with the forest")
+            # Trees pickled before compiled arrays existed
+            self.flat = flatTree.FlatTree.from_root(self.root)
+        return self.flat.predict(X)[0]
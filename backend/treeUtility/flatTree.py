@@ -0,0 +1,171 @@
+# flatTree.py
+import numpy as np
+
+# FLAT TREE — array-backed, compiled form of a fitted decision tree
+class FlatTree:
+    """
+    A fitted decision tree stored as parallel NumPy arrays, one entry per node
+    (pre-order, root at index 0):
+      - feature: feature index to test (-1 for leaves)
+      - threshold: go left when x[feature] <= threshold
+      - left / right: child node indices (-1 for leaves)
+      - value: class label for leaves (-1 for internal nodes); multi-output trees
+        store a row of labels per node, shape (n_nodes, n_outputs)
+
+    Tables mapped from a model file record (path, mtime_ns) of that file in source.
+    """
+    def __init__(self, feature, threshold, left, right, value):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.source = None
+
+    @classmethod
+    def from_root(cls, root):
+        """Compile a tree of Node objects into flat arrays."""
+        feature, threshold, left, right, value = [], [], [], [], []
+        stack = [(root, -1, False)]
+        while stack:
+            node, parent, is_right = stack.pop()
+            index = len(feature)
+            if parent >= 0:
+                (right if is_right else left)[parent] = index
+
+            if node.value is not None:
+                feature.append(-1)
+                threshold.append(0.0)
+                value.append(node.value)
+            else:
+                feature.append(node.feature)
+                threshold.append(node.threshold)
+                value.append(None)
+                # Push right first so the left subtree is numbered next (pre-order)
+                stack.append((node.right, index, True))
+                stack.append((node.left, index, False))
+            left.append(-1)
+            right.append(-1)
+
+        leaf_shape = np.shape(next(v for v in value if v is not None))
+        values = np.full((len(value),) + leaf_shape, -1, dtype=np.int64)
+        for index, leaf_value in enumerate(value):
+            if leaf_value is not None:
+                values[index] = leaf_value
+
+        return cls(
+            np.array(feature, dtype=np.int32),
+            np.array(threshold, dtype=np.float64),
+            np.array(left, dtype=np.int32),
+            np.array(right, dtype=np.int32),
+            values,
+        )
+
+    @classmethod
+    def pack(cls, flats):
+        """
+        Concatenate several flat trees (or already packed tables) into one node table.
+        Returns (packed FlatTree, offset of each input in the table); for single trees
+        the offset is the tree's root index.
+        """
+        sizes = np.array([len(flat.feature) for flat in flats])
+        roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int32)
+
+        def shift(children, offset):
+            return np.where(children >= 0, children + offset, -1)
+
+        packed = cls(
+            np.concatenate([flat.feature for flat in flats]),
+            np.concatenate([flat.threshold for flat in flats]),
+            np.concatenate([shift(flat.left, root) for flat, root in zip(flats, roots)]).astype(np.int32),
+            np.concatenate([shift(flat.right, root) for flat, root in zip(flats, roots)]).astype(np.int32),
+            np.concatenate([flat.value for flat in flats]),
+        )
+        return packed, roots
+
+    @classmethod
+    def pack_trees(cls, forests):
+        """
+        Pack the trees of several (table, roots) pairs into one node table, copying only
+        the listed trees: a table shared by several pairs (e.g. loaded from one model
+        file) or holding trees nobody lists is never copied whole.
+        Returns (packed FlatTree, roots of each pair in it).
+        """
+        selected = [table.select(roots) for table, roots in forests]
+        packed, offsets = cls.pack([table for table, _ in selected])
+        return packed, [(roots + offset).astype(np.int32) for (_, roots), offset in zip(selected, offsets)]
+
+    def select(self, roots):
+        """
+        Copy the trees rooted at `roots` (in that order) into a new compact table.
+        In pre-order a tree ends at its right-most leaf, so each tree is one slice.
+        Returns (FlatTree, root of each tree in it).
+        """
+        roots = np.asarray(roots, dtype=np.intp)
+        sizes = self.tree_ends(roots) - roots
+        new_roots = np.cumsum(sizes) - sizes
+        shift = np.repeat(new_roots - roots, sizes)
+        nodes = np.arange(sizes.sum()) - shift
+
+        def move(children):
+            return np.where(children >= 0, children + shift, -1).astype(np.int32)
+
+        table = FlatTree(
+            self.feature[nodes],
+            self.threshold[nodes],
+            move(self.left[nodes]),
+            move(self.right[nodes]),
+            self.value[nodes],
+        )
+        return table, new_roots.astype(np.int32)
+
+    def subtree(self, root):
+        """Copy the tree rooted at `root` out of a packed table as a standalone FlatTree."""
+        return self.select([root])[0]
+
+    def tree_ends(self, roots):
+        """One past the last node of each tree in roots (follows right children to the right-most leaf)."""
+        ends = np.array(roots, dtype=np.intp)
+        internal = self.feature[ends] >= 0
+        while internal.any():
+            ends = np.where(internal, self.right[ends], ends)
+            internal = self.feature[ends] >= 0
+        return ends + 1
+
+    def apply(self, X, roots=None, blocks=None):
+        """
+        Route every row of X to its leaf, one tree level at a time.
+
+        roots lists the trees (root indices) to run; by default the single tree at 0.
+        Every (tree, row) pair moves down one level per step, so a whole forest and a
+        whole batch are traversed together. X may also be a stack of row blocks,
+        shape (n_blocks, n_rows, n_features), with blocks[i] naming the block tree i
+        reads (e.g. rows scaled differently per model).
+        Returns leaf indices, shape (n_roots, n_rows).
+        """
+        X = np.asarray(X)
+        roots = np.zeros(1, dtype=np.int32) if roots is None else roots
+        if X.ndim == 2:
+            X = X[None]
+            blocks = np.zeros(len(roots), dtype=np.intp)
+        n_rows = X.shape[1]
+
+        node_idx = np.repeat(roots, n_rows)
+        pair_block = np.repeat(blocks, n_rows)
+        pair_row = np.tile(np.arange(n_rows), len(roots))
+        active = np.arange(len(node_idx))
+
+        while active.size:
+            nodes = node_idx[active]
+            feats = self.feature[nodes]
+            internal = feats >= 0
+            active, nodes, feats = active[internal], nodes[internal], feats[internal]
+
+            go_left = X[pair_block[active], pair_row[active], feats] <= self.threshold[nodes]
+            node_idx[active] = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return node_idx.reshape(len(roots), n_rows)
+
+    def predict(self, X, roots=None, blocks=None):
+        """Predict class labels for all rows of X, shape (n_roots, n_rows) or (n_roots, n_rows, n_outputs)."""
+        return self.value[self.apply(X, roots, blocks)]
@@ -0,0 +1,112 @@
+# forestEngine.py
+import itertools
+import numpy as np
+from treeUtility import flatTree
+from treeUtility.randomForest import majority_vote, vote_counts
+from utility import metrics
+
+# FOREST ENGINE — packed inference over several fitted Random Forests
+class ForestEngine:
+    """
+    Packs every tree of several fitted RandomForest models (e.g. the four horizon
+    models) into one contiguous node table.
+
+    Scaling is done with each model's StandardScaler parameters in one broadcast,
+    and a single traversal returns the votes of every model, so predicting one
+    patient for all horizons costs a handful of array operations instead of one
+    scaler call and one forest walk per model.
+
+    Every engine gets a unique version number, usable as a cache key for its results.
+    An engine over a model file's node table records (path, mtime_ns, model names) in
+    source, so another process can map the same file instead of copying the table.
+    """
+    versions = itertools.count(1)
+
+    def __init__(self, models):
+        self.version = next(ForestEngine.versions)
+        self.names = list(models)
+        for model in models.values():
+            if getattr(model, "packed", None) is None:
+                model.compile()
+
+        tables = [model.packed for model in models.values()]
+        if all(table is tables[0] for table in tables):
+            # Models loaded from one model file already share a node table (no copy)
+            self.table, model_roots = tables[0], [model.roots for model in models.values()]
+        else:
+            # Mixed tables (e.g. one refitted horizon beside loaded ones): copy only the engine's own trees
+            self.table, model_roots = flatTree.FlatTree.pack_trees([(model.packed, model.roots) for model in models.values()])
+
+        source = getattr(self.table, "source", None)
+        self.source = None if source is None else (*source, self.names)
+        n_trees = [len(model.roots) for model in models.values()]
+        self.roots = np.concatenate(model_roots)
+        self.blocks = np.repeat(np.arange(len(n_trees)), n_trees)
+        self.bounds = np.concatenate(([0], np.cumsum(n_trees)))
+        self.means = np.array([model.scaler.mean_ for model in models.values()])
+        self.scales = np.array([model.scaler.scale_ for model in models.values()])
+        self.n_classes = max(model.get_n_classes() for model in models.values())
+
+    def tree_predictions(self, X):
+        """Scale X once per model and return every tree's prediction, shape (n_trees_total, n_rows)."""
+        X = np.asarray(X, dtype=np.float64)
+        with metrics.stage("engine.scale"):
+            # Same arithmetic as StandardScaler.transform: (x - mean) / scale
+            X_scaled = (X[None, :, :] - self.means[:, None, :]) / self.scales[:, None, :]
+        with metrics.stage("engine.traverse"):
+            return self.table.predict(X_scaled, self.roots, self.blocks)
+
+    def per_model(self, tree_preds):
+        """Yield (model name, that model's slice of tree_preds)."""
+        for name, start, end in zip(self.names, self.bounds[:-1], self.bounds[1:]):
+            yield name, tree_preds[start:end]
+
+    def predict(self, X):
+        """Return {model name: predicted labels for every row of X}."""
+        X = np.asarray(X, dtype=np.float64)
+        labels = {name: [] for name in self.names}
+        for start in range(0, len(X), self.predict_chunk):
+            tree_preds = self.tree_predictions(X[start:start + self.predict_chunk])
+            with metrics.stage("engine.vote"):
+                for name, preds in self.per_model(tree_preds):
+                    labels[name].append(majority_vote(preds, self.n_classes))
+        return {name: np.concatenate(parts) if parts else np.empty(0, dtype=np.int64) for name, parts in labels.items()}
+
+    def predict_proba(self, X):
+        """Return {model name: per-class vote fractions, shape (n_rows, n_classes)}."""
+        return {
+            name: vote_counts(preds, self.n_classes) / len(preds)
+            for name, preds in self.per_model(self.tree_predictions(X))
+        }
+
+    # Rows per traversal; bounds the (n_trees_total x rows) working arrays
+    predict_chunk = 512
+
+    def predict_rows(self, X):
+        """Every row's predict_one result: a list of {model name: (label, vote fractions)}, one per row."""
+        X = np.asarray(X, dtype=np.float64)
+        rows = [{} for _ in range(len(X))]
+        for start in range(0, len(X), self.predict_chunk):
+            tree_preds = self.tree_predictions(X[start:start + self.predict_chunk])
+            with metrics.stage("engine.vote"):
+                for name, preds in self.per_model(tree_preds):
+                    labels = majority_vote(preds, self.n_classes)
+                    probas = vote_counts(preds, self.n_classes) / len(preds)
+                    for offset, (label, proba) in enumerate(zip(labels.tolist(), probas)):
+                        rows[start + offset][name] = (label, proba)
+        return rows
+
+    def predict_one(self, x):
+        """
+        Single-row fast path: one traversal for every model.
+        Returns {model name: (predicted label, vote fraction per class)}.
+        """
+        tree_preds = self.tree_predictions(np.reshape(x, (1, -1)))
+        results = {}
+        with metrics.stage("engine.vote"):
+            for name, preds in self.per_model(tree_preds):
+                label = int(majority_vote(preds, self.n_classes)[0])
+                proba = vote_counts(preds, self.n_classes)[0] / len(preds)
+                results[name] = (label, proba)
+        return results
+
@@ -0,0 +1,156 @@
+# modelFile.py
+import json
+import os
+import time
+import numpy as np
+from sklearn.preprocessing import StandardScaler
+from treeUtility import flatTree, randomForest
+
+# MODEL FILE — versioned flat binary format for fitted Random Forests
+#
+# Layout (little-endian):
+#   8 bytes   magic b"PDPFRST\0"
+#   uint32    format version
+#   uint32    header length in bytes
+#   header    UTF-8 JSON: creation time, metadata, array table, per-model entries
+#   arrays    raw array data, each starting on a 64-byte boundary
+#
+# All models in a file share one node table (feature, threshold, left, right,
+# value); each model owns a slice of the roots array plus its StandardScaler
+# parameters. load_models memory-maps the file, so every process that loads it
+# shares the same physical pages instead of unpickling its own Node graphs.
+
+MAGIC = b"PDPFRST\0"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+PARAMS = ["n_trees", "max_depth", "min_samples_split", "n_features", "criterion", "max_bins", "random_state", "oob_score", "oob_tol", "oob_rounds"]
+
+def save_models(models, path, metadata=None):
+    """
+    Write {name: fitted RandomForest} to path.
+    The file is written next to path and renamed into place, so readers that
+    already mapped the old file keep a valid view.
+    """
+    names = list(models)
+    for model in models.values():
+        if getattr(model, "packed", None) is None:
+            model.compile()
+
+    # Only each model's own trees are written, also when models share a loaded node table
+    table, model_roots = flatTree.FlatTree.pack_trees([(model.packed, model.roots) for model in models.values()])
+    roots = np.concatenate(model_roots)
+    arrays = {
+        "feature": table.feature,
+        "threshold": table.threshold,
+        "left": table.left,
+        "right": table.right,
+        "value": table.value,
+        "roots": roots.astype(np.int32),
+        "scaler_mean": np.array([model.scaler.mean_ for model in models.values()]),
+        "scaler_scale": np.array([model.scaler.scale_ for model in models.values()]),
+        "scaler_var": np.array([model.scaler.var_ for model in models.values()]),
+    }
+
+    model_entries, start = {}, 0
+    for name, model in models.items():
+        end = start + len(model.roots)
+        model_entries[name] = {
+            "roots": [start, end],
+            "n_classes": model.get_n_classes(),
+            "n_samples_seen": int(model.scaler.n_samples_seen_),
+            "params": {param: getattr(model, param, None) for param in PARAMS},
+            "metadata": getattr(model, "metadata", {}),
+            "bin_edges": None if getattr(model, "bin_edges", None) is None else [edges.tolist() for edges in model.bin_edges],
+        }
+        start = end
+
+    # Offsets are relative to the end of the header, which is padded to ALIGNMENT
+    array_entries, position = {}, 0
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        arrays[key] = array
+        array_entries[key] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": position}
+        position += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "metadata": metadata or {},
+        "arrays": array_entries,
+        "models": model_entries,
+    }, default=json_default).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 8 + len(header)) % ALIGNMENT)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([FORMAT_VERSION, len(header)], dtype="<u4").tobytes())
+        f.write(header)
+        for key, array in arrays.items():
+            f.write(array.tobytes())
+            f.write(b"\0" * (-array.nbytes % ALIGNMENT))
+    os.replace(tmp_path, path)
+
+def read_header(path):
+    """Return the parsed JSON header of a model file (format version included)."""
+    with open(path, "rb") as f:
+        magic = f.read(len(MAGIC))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a forest model file")
+        version, header_len = np.frombuffer(f.read(8), dtype="<u4")
+        if version > FORMAT_VERSION:
+            raise ValueError(f"{path} uses format version {version}; this build reads up to {FORMAT_VERSION}")
+        header = json.loads(f.read(int(header_len)))
+    header["format_version"] = int(version)
+    header["data_offset"] = len(MAGIC) + 8 + int(header_len)
+    return header
+
+def load_models(path):
+    """
+    Memory-map a model file and return {name: RandomForest}.
+
+    The node arrays are read-only views into the mapping, shared by every model
+    from the file (each uses its own roots). Loaded models predict from the node
+    table only; their Node trees are not rebuilt.
+    """
+    # Saving replaces the file, so its mtime identifies the version that was mapped
+    mtime_ns = os.stat(path).st_mtime_ns
+    header = read_header(path)
+    raw = np.memmap(path, dtype=np.uint8, mode="r")
+    data_offset = header["data_offset"]
+
+    arrays = {}
+    for key, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        start = data_offset + entry["offset"]
+        count = int(np.prod(entry["shape"]))
+        arrays[key] = raw[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+
+    table = flatTree.FlatTree(arrays["feature"], arrays["threshold"], arrays["left"], arrays["right"], arrays["value"])
+    table.source = (os.path.abspath(path), mtime_ns)
+
+    models = {}
+    for i, (name, entry) in enumerate(header["models"].items()):
+        model = randomForest.RandomForest(**entry["params"])
+        model.packed = table
+        start, end = entry["roots"]
+        model.roots = arrays["roots"][start:end]
+        model.n_classes = entry["n_classes"]
+        model.metadata = entry["metadata"]
+        if entry.get("bin_edges") is not None:
+            model.bin_edges = [np.array(edges, dtype=np.float64) for edges in entry["bin_edges"]]
+
+        scaler = StandardScaler()
+        scaler.mean_ = np.array(arrays["scaler_mean"][i])
+        scaler.scale_ = np.array(arrays["scaler_scale"][i])
+        scaler.var_ = np.array(arrays["scaler_var"][i])
+        scaler.n_features_in_ = len(scaler.mean_)
+        scaler.n_samples_seen_ = entry["n_samples_seen"]
+        model.scaler = scaler
+        models[name] = model
+    return models
+
+def json_default(value):
+    """Let NumPy scalars in params/metadata serialize as plain JSON numbers."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
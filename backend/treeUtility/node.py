@@ -5,10 +5,21 @@ class Node:
     A single node in a decision tree.
     Each node represents a condition (feature + threshold).
     Leaf nodes store a final prediction value (class label).
+
+    __slots__ keeps each node to a fixed-size object with no per-instance __dict__.
     """
+    __slots__ = ("feature", "threshold", "left", "right", "value")
+
     def __init__(self, feature=None, threshold=None, left=None, right=None, *, value=None):
         self.feature = feature          # Index of the feature used for splitting
         self.threshold = threshold      # Threshold value for the feature
         self.left = left                # Left child node
         self.right = right              # Right child node
         self.value = value              # Class label if leaf node
+
+    def __setstate__(self, state):
+        # Nodes pickled before __slots__ carry a plain attribute dict
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -1,7 +1,12 @@
 # randomForest.py
+import copy
+import os
+import sys
+import shutil
+import tempfile
 import numpy as np
-from collections import Counter
-from treeUtility import decisionTree
+from concurrent.futures import ProcessPoolExecutor
+from treeUtility import decisionTree, flatTree, node
 from sklearn.preprocessing import StandardScaler
 
 # RANDOM FOREST CLASS 
@@ -9,46 +14,517 @@ class RandomForest:
     """
     Random Forest — collection of Decision Trees.
     Improves stability and accuracy using bootstrap sampling.
+
+    max_bins: None trains on exact feature values. An int (at most 255) enables
+    histogram mode: fit quantizes every feature once into a shared uint8 matrix
+    and trees pick splits from per-bin class counts.
+
+    n_jobs: number of worker processes used to fit trees (-1 = all cores). Every tree
+    draws from its own Generator seeded from random_state, so the fitted forest is the
+    same for any n_jobs. With random_state=None the seed comes from np.random.
+
+    Multi-output: fitting on a 2D y (n_samples, n_outputs), e.g. every horizon's
+    labels at once, grows one set of trees whose leaves hold a label per output.
+    predict then returns (n_samples, n_outputs) from a single traversal.
+
+    oob_score: record every tree's in-bag mask (self.in_bag, bit-packed per tree) and
+    score each training row with the trees that did not draw it. The out-of-bag
+    accuracy and confusion matrix (self.oob, also in metadata) are accumulated as
+    chunks of trees finish, so no held-out rows or extra prediction pass are needed.
+
+    oob_tol: grow trees in chunks of oob_chunk and stop once the best out-of-bag
+    accuracy of the last oob_rounds chunks beats the best before them by less than
+    oob_tol; n_trees is then only the upper limit. Implies oob_score. The accuracy
+    after each chunk is kept in metadata["oob_curve"] as [n_trees, accuracy] pairs.
     """
-    def __init__(self, n_trees=850, max_depth=30, min_samples_split=2, n_features=None, criterion="gini"):
+    def __init__(self, n_trees=850, max_depth=30, min_samples_split=2, n_features=None, criterion="gini",
+                 max_bins=None, n_jobs=1, random_state=None, oob_score=False, oob_tol=None, oob_rounds=2):
         self.n_trees = n_trees
         self.max_depth = max_depth
         self.min_samples_split = min_samples_split
         self.n_features = n_features
         self.criterion = criterion
+        self.max_bins = max_bins
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.oob_score = oob_score
+        self.oob_tol = oob_tol
+        self.oob_rounds = oob_rounds
+        self.bin_edges = None
+        self.in_bag = None
+        self.oob = None
         self.trees = []
         self.scaler = StandardScaler()
+        self.packed = None
+        self.roots = None
+        self.n_classes = None
+        self.metadata = {}
 
-    def fit(self, X, y):
-        """Train multiple trees on random bootstrap samples."""
+    def fit(self, X, y, executor=None):
+        """
+        Train multiple trees on random bootstrap samples.
+
+        If executor (a ProcessPoolExecutor) is given, trees are fitted on it instead of
+        a pool created from n_jobs; this lets several forests share one pool.
+        """
         X = self.scaler.fit_transform(X)
         self.trees = []
+        self.n_classes = int(np.max(y)) + 1
+
+        if self.max_bins is not None:
+            self.bin_edges = self.compute_bin_edges(X)
+            X = self.bin_data(X)
+
+        # The seed actually used is kept so every tree's bootstrap sample can be regenerated later
+        random_state = np.random.randint(2**31 - 1) if self.random_state is None else self.random_state
+        self.metadata = {"n_samples": int(X.shape[0]), "n_features": int(X.shape[1]), "random_state": int(random_state)}
+        seeds = np.random.SeedSequence(random_state).spawn(self.n_trees)
+
+        oob_tol = getattr(self, "oob_tol", None)
+        self.oob = OutOfBag(y, self.n_classes) if getattr(self, "oob_score", False) or oob_tol is not None else None
+        self.trees = self.fit_seeded(X, y, seeds, executor, self.oob, oob_tol)
+        if self.oob is not None:
+            self.in_bag = np.concatenate(self.oob.in_bag)
+            self.metadata.update(self.oob.summary())
+        self.compile()
+
+    def fit_seeded(self, X, y, seeds, executor=None, oob=None, oob_tol=None):
+        """
+        Fit one tree per seed on prepared (scaled, binned) data, serially or on a process pool.
+        With an OutOfBag accumulator, each finished chunk of trees adds its out-of-bag votes,
+        and with oob_tol the remaining seeds are dropped once the accuracy has converged.
+        """
+        tree_params = {
+            "max_depth": self.max_depth,
+            "min_samples_split": self.min_samples_split,
+            "n_features": self.n_features,
+            "criterion": self.criterion,
+        }
+        if not len(seeds):
+            return []
+        n_classes = None if oob is None else self.n_classes
+        presorted = presort(X) if self.bin_edges is None else None
+        n_jobs = resolve_n_jobs(self.n_jobs)
+        if executor is None and n_jobs == 1:
+            step = len(seeds) if oob is None else self.oob_chunk
+            chunks = (fit_trees(X, y, self.bin_edges, tree_params, seeds[start:start + step], n_classes, presorted)
+                      for start in range(0, len(seeds), step))
+        else:
+            chunk_size = None if oob_tol is None else self.oob_chunk
+            chunks = self.fit_parallel(X, y, tree_params, seeds, executor, n_jobs, n_classes, chunk_size, presorted)
+
+        trees = []
+        for chunk_trees, in_bag, votes in chunks:
+            trees.extend(chunk_trees)
+            if oob is not None:
+                oob.add(in_bag, votes)
+                if oob_tol is not None and oob.converged(oob_tol, getattr(self, "oob_rounds", 2)):
+                    # Closing the generator cancels chunks that have not started
+                    chunks.close()
+                    break
+        return trees
+
+    # Trees fitted between out-of-bag updates (serial fits, or parallel fits with oob_tol)
+    oob_chunk = 25
+
+    def tree_seed(self, index):
+        """SeedSequence tree `index` was fitted with (the same child fit gets from spawn)."""
+        random_state = self.metadata.get("random_state", self.random_state)
+        if random_state is None:
+            raise ValueError("forest was fitted without a recorded random_state; tree seeds are unknown")
+        return np.random.SeedSequence(random_state, spawn_key=(index,))
+
+    def in_bag_counts(self, rows, n_samples=None):
+        """
+        How often each training row was drawn into each tree's bootstrap sample,
+        shape (n_trees, len(rows)). The samples are regenerated from the tree seeds.
+        """
+        rows = np.atleast_1d(rows)
+        n_samples = self.metadata["n_samples"] if n_samples is None else n_samples
+        counts = np.empty((len(self.roots), len(rows)), dtype=np.int64)
+        for index in range(len(self.roots)):
+            idxs = self.bootstrap_indices(n_samples, np.random.default_rng(self.tree_seed(index)))
+            counts[index] = np.bincount(idxs, minlength=n_samples)[rows]
+        return counts
+
+    def refit_trees(self, X, y, tree_indices, executor=None):
+        """
+        Return a copy of the forest with the listed trees refitted on the training set (X, y).
+
+        Each refitted tree reuses its original seed, so it draws the same bootstrap
+        rows and feature subsets and only sees the new data values. The scaler and
+        bin edges stay as fitted. The forest itself is not modified, so it can keep
+        serving predictions until the copy is swapped in.
+        """
+        if len(X) != self.metadata["n_samples"]:
+            raise ValueError(f"forest was fitted on {self.metadata['n_samples']} rows, got {len(X)}")
+        if not len(tree_indices):
+            forest = copy.copy(self)
+            forest.metadata = dict(self.metadata)
+            return forest
+        if getattr(self, "packed", None) is None:
+            self.compile()
+
+        X = self.scaler.transform(X)
+        if self.bin_edges is not None:
+            X = self.bin_data(X)
+        tree_indices = [int(index) for index in tree_indices]
+        new_trees = self.fit_seeded(X, np.asarray(y), [self.tree_seed(index) for index in tree_indices], executor)
+        # The out-of-bag figures from fit stay in metadata; they do not reflect the refitted trees
+
+        # The node table holds the only copy of the kept trees; their flats are cut from it
+        flats = [self.packed.subtree(root) for root in self.roots]
+        for index, tree in zip(tree_indices, new_trees):
+            flats[index] = tree.flat
 
-        for _ in range(self.n_trees):
-            tree = decisionTree.DecisionTree(
-                max_depth=self.max_depth,
-                min_samples_split=self.min_samples_split,
-                n_features=self.n_features,
-                criterion=self.criterion
-            )
-            X_sample, y_sample = self.bootstrap_sample(X, y)
-            tree.fit(X_sample, y_sample)
-            self.trees.append(tree)
-
-    def bootstrap_sample(self, X, y):
-        """Randomly sample with replacement with boostrap sampling."""
-        n_samples = X.shape[0]
-        idxs = np.random.choice(n_samples, n_samples, replace=True)
-        return X[idxs], y[idxs]
+        forest = copy.copy(self)
+        forest.metadata = dict(self.metadata)
+        if self.trees:
+            forest.trees = list(self.trees)
+            for index, tree in zip(tree_indices, new_trees):
+                forest.trees[index] = tree
+        forest.packed, forest.roots = flatTree.FlatTree.pack(flats)
+        for tree in new_trees:
+            tree.flat = None
+        return forest
+
+    def compile(self):
+        """
+        Pack the compiled arrays of every tree into one node table for batched prediction.
+        The table then holds the only copy: each tree's own FlatTree is dropped.
+        """
+        flats = [tree.flat if getattr(tree, "flat", None) is not None else flatTree.FlatTree.from_root(tree.root)
+                 for tree in self.trees]
+        self.packed, self.roots = flatTree.FlatTree.pack(flats)
+        for tree in self.trees:
+            tree.flat = None
+
+    def __setstate__(self, state):
+        """Forests pickled by older versions lack newer attributes (roots, metadata, ...); they get the defaults."""
+        self.__dict__.update({**vars(RandomForest()), **state})
+
+    def fit_parallel(self, X, y, tree_params, seeds, executor, n_jobs, n_classes=None, chunk_size=None, presorted=None):
+        """
+        Fit trees in chunks on a process pool; yields each chunk's fit_trees result in tree order.
+        Chunks hold chunk_size trees, or split the seeds into 4 per worker when it is None.
+
+        X and y are written once to a temporary .npy file and memory-mapped by the
+        workers, so the training matrix is not pickled into every task.
+        """
+        tmp_dir = tempfile.mkdtemp(prefix="forest_")
+        own_executor = executor is None
+        futures = []
+        if own_executor:
+            executor = ProcessPoolExecutor(max_workers=n_jobs)
+        try:
+            X_path = os.path.join(tmp_dir, "X.npy")
+            y_path = os.path.join(tmp_dir, "y.npy")
+            np.save(X_path, X)
+            np.save(y_path, y)
+            presorted_path = None
+            if presorted is not None:
+                presorted_path = os.path.join(tmp_dir, "presorted.npy")
+                np.save(presorted_path, presorted)
+
+            n_chunks = min(len(seeds), 4 * n_jobs) if chunk_size is None else -(-len(seeds) // chunk_size)
+            chunks = [chunk for chunk in np.array_split(np.arange(len(seeds)), n_chunks) if len(chunk)]
+            futures = [
+                executor.submit(fit_trees_memmap, X_path, y_path, self.bin_edges, tree_params,
+                                [seeds[i] for i in chunk], n_classes, presorted_path)
+                for chunk in chunks
+            ]
+            for future in futures:
+                yield future.result()
+        finally:
+            # Only reached early when the caller stops consuming (e.g. oob_tol converged)
+            for future in futures:
+                future.cancel()
+            if own_executor:
+                executor.shutdown()
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def compute_bin_edges(self, X):
+        """
+        Per-feature bin upper edges (at most max_bins bins each).
+
+        Features with few unique values keep one bin per value, so their splits match
+        exact mode; the rest use quantiles taken from real data values.
+        """
+        if not 2 <= self.max_bins <= 255:
+            raise ValueError("max_bins must be between 2 and 255")
+
+        bin_edges = []
+        for X_col in X.T:
+            values = np.unique(X_col)
+            if len(values) > self.max_bins:
+                quantiles = np.linspace(0, 1, self.max_bins + 1)[1:-1]
+                values = np.unique(np.quantile(X_col, quantiles, method="lower"))
+            else:
+                values = values[:-1]
+            bin_edges.append(values)
+        return bin_edges
+
+    def bin_data(self, X):
+        """Map scaled features to bin indices: bin b holds edges[b-1] < x <= edges[b]."""
+        X_binned = np.empty(X.shape, dtype=np.uint8)
+        for index, edges in enumerate(self.bin_edges):
+            X_binned[:, index] = np.searchsorted(edges, X[:, index], side="left")
+        return X_binned
+
+    @staticmethod
+    def bootstrap_indices(n_samples, rng=np.random):
+        """Row indices of one bootstrap sample (n_samples draws with replacement)."""
+        return rng.choice(n_samples, n_samples, replace=True)
 
     def predict(self, X):
-        """Aggregate predictions by majority vote."""
+        """Aggregate predictions by majority vote (one column per output for multi-output forests)."""
+        tree_preds = self.tree_predictions(X)
+        if tree_preds.ndim == 3:
+            return np.stack([majority_vote(preds, self.get_n_classes()) for preds in np.moveaxis(tree_preds, 2, 0)], axis=1)
+        return majority_vote(tree_preds, self.get_n_classes())
+
+    def predict_proba(self, X):
+        """Fraction of trees voting for each class, shape (n_samples, n_classes) or (n_samples, n_outputs, n_classes)."""
+        tree_preds = self.tree_predictions(X)
+        if tree_preds.ndim == 3:
+            return np.stack([vote_counts(preds, self.get_n_classes()) for preds in np.moveaxis(tree_preds, 2, 0)], axis=1) / len(self.roots)
+        return vote_counts(tree_preds, self.get_n_classes()) / len(self.roots)
+
+    def tree_predictions(self, X):
+        """Prediction of every tree for every sample, shape (n_trees, n_samples)."""
+        if getattr(self, "packed", None) is None:
+            self.compile()
         X = self.scaler.transform(X)
-        tree_preds = np.array([tree.predict(X) for tree in self.trees])
-        tree_preds = np.swapaxes(tree_preds, 0, 1)
-        return np.array([self.majority_vote(preds) for preds in tree_preds])
-
-    def majority_vote(self, preds):
-        """Returns the most voted"""
-        return Counter(preds).most_common(1)[0][0]
-    
\ No newline at end of file
+        return np.concatenate([
+            self.packed.predict(X[start:start + self.predict_chunk], self.roots)
+            for start in range(0, len(X), self.predict_chunk)
+        ], axis=1)
+
+    def node_count(self):
+        """Number of tree nodes in the forest (only this forest's trees when the node table is shared)."""
+        if getattr(self, "packed", None) is None:
+            self.compile()
+        return int(np.sum(self.packed.tree_ends(self.roots) - self.roots))
+
+    def memory_bytes(self):
+        """Bytes of this forest's node arrays, roots and scaler parameters."""
+        if getattr(self, "packed", None) is None:
+            self.compile()
+        table = self.packed
+        per_node = sum(array.itemsize * int(np.prod(array.shape[1:])) for array in
+                       (table.feature, table.threshold, table.left, table.right, table.value))
+        scaler = sum(getattr(self.scaler, name).nbytes for name in ("mean_", "scale_", "var_") if hasattr(self.scaler, name))
+        return self.node_count() * per_node + self.roots.nbytes + scaler
+
+    def memory_report(self):
+        """
+        Memory held by this forest, in bytes, plus tree/node counts:
+          - node_table_bytes: this forest's share of the packed node table used for prediction
+          - tree_arrays_bytes: per-tree FlatTree arrays still on the DecisionTree objects (compile drops them)
+          - node_objects / node_object_bytes: Node graphs still held (trees fitted with keep_nodes)
+        """
+        if getattr(self, "packed", None) is None:
+            self.compile()
+        ends = self.packed.tree_ends(self.roots)
+        is_leaf = np.concatenate(([0], np.cumsum(self.packed.feature < 0)))
+        node_objects = sum(count_nodes(tree.root) for tree in self.trees if getattr(tree, "root", None) is not None)
+
+        report = {
+            "trees": len(self.roots),
+            "nodes": int(np.sum(ends - self.roots)),
+            "leaves": int(np.sum(is_leaf[ends] - is_leaf[self.roots])),
+            "node_table_bytes": self.memory_bytes(),
+            "tree_arrays_bytes": sum(
+                sum(array.nbytes for array in (tree.flat.feature, tree.flat.threshold, tree.flat.left,
+                                               tree.flat.right, tree.flat.value))
+                for tree in self.trees if getattr(tree, "flat", None) is not None),
+            "node_objects": node_objects,
+            "node_object_bytes": node_objects * sys.getsizeof(node.Node()),
+        }
+        report["total_bytes"] = report["node_table_bytes"] + report["tree_arrays_bytes"] + report["node_object_bytes"]
+        return report
+
+    def get_n_classes(self):
+        """Number of classes seen in fit (read from the leaves for models saved before it was stored)."""
+        if getattr(self, "n_classes", None) is None:
+            if getattr(self, "packed", None) is None:
+                self.compile()
+            self.n_classes = int(self.packed.value.max()) + 1
+        return self.n_classes
+
+    # Rows routed per packed traversal; bounds the (n_trees x rows) working arrays
+    predict_chunk = 2048
+
+
+# VOTING
+def vote_counts(tree_preds, n_classes):
+    """Per-class vote counts for a (n_trees, n_samples) prediction array, shape (n_samples, n_classes)."""
+    n_samples = tree_preds.shape[1]
+    codes = tree_preds + np.arange(n_samples) * n_classes
+    return np.bincount(codes.ravel(), minlength=n_samples * n_classes).reshape(n_samples, n_classes)
+
+def majority_vote(tree_preds, n_classes):
+    """
+    Majority vote over axis 0 of a (n_trees, n_samples) prediction array.
+
+    Ties go to the tied class that appears first in tree order, the same result
+    as Counter(preds).most_common(1).
+    """
+    counts = vote_counts(tree_preds, n_classes)
+    is_max = counts == counts.max(axis=1, keepdims=True)
+    winners = is_max.argmax(axis=1)
+
+    tied = np.flatnonzero(is_max.sum(axis=1) > 1)
+    if tied.size:
+        n_trees = tree_preds.shape[0]
+        is_class = tree_preds[:, tied, None] == np.arange(n_classes)
+        # Position of each class's first vote; classes never voted for sort last
+        first_vote = np.where(is_class.any(axis=0), is_class.argmax(axis=0), n_trees)
+        winners[tied] = np.where(is_max[tied], first_vote, n_trees + 1).argmin(axis=1)
+    return winners
+
+
+def count_nodes(root):
+    """Number of Node objects reachable from root."""
+    count, stack = 0, [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.value is None:
+            stack.extend((node.left, node.right))
+    return count
+
+
+# TREE FITTING (module level so worker processes can run it)
+def resolve_n_jobs(n_jobs):
+    """Turn an n_jobs setting into a worker count (None = 1, -1 = all cores)."""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+def fit_trees(X, y, bin_edges, tree_params, seeds, n_classes=None, presorted=None):
+    """
+    Fit one DecisionTree per SeedSequence, each on its own bootstrap sample.
+
+    Every tree reads the same X: its bootstrap sample is passed as per-row draw
+    counts, and exact-mode trees share one presorted index (computed here if not given).
+
+    Returns (trees, in_bag, votes). With n_classes given, in_bag holds each tree's
+    bit-packed in-bag mask and votes the out-of-bag vote counts of this chunk,
+    shape y.shape + (n_classes,); otherwise both are None.
+    """
+    trees = []
+    in_bag = votes = X_eval = None
+    if n_classes is not None:
+        in_bag = np.zeros((len(seeds), len(X)), dtype=bool)
+        votes = np.zeros(np.shape(y) + (n_classes,), dtype=np.int32)
+        X_eval = X if bin_edges is None else bin_values(X, bin_edges)
+    if bin_edges is None and presorted is None:
+        presorted = presort(X)
+
+    for index, seed in enumerate(seeds):
+        rng = np.random.default_rng(seed)
+        tree = decisionTree.DecisionTree(**tree_params)
+        counts = np.bincount(RandomForest.bootstrap_indices(len(X), rng), minlength=len(X))
+        tree.fit(X, y, bin_edges=bin_edges, rng=rng, sample_counts=counts, presorted=presorted)
+        trees.append(tree)
+
+        if n_classes is not None:
+            in_bag[index] = counts > 0
+            out = np.flatnonzero(~in_bag[index])
+            preds = tree.predict(X_eval[out]).reshape(len(out), -1)
+            # One vote per (out-of-bag row, output); the flat indices are unique, so += is safe
+            n_outputs = preds.shape[1]
+            codes = ((out[:, None] * n_outputs + np.arange(n_outputs)) * n_classes + preds).ravel()
+            votes.reshape(-1)[codes] += 1
+
+    return trees, None if in_bag is None else np.packbits(in_bag, axis=1), votes
+
+def fit_trees_memmap(X_path, y_path, bin_edges, tree_params, seeds, n_classes=None, presorted_path=None):
+    """Worker entry point: memory-map the shared training arrays and fit a chunk of trees."""
+    X = np.load(X_path, mmap_mode="r")
+    y = np.load(y_path, mmap_mode="r")
+    presorted = None if presorted_path is None else np.load(presorted_path, mmap_mode="r")
+    return fit_trees(X, y, bin_edges, tree_params, seeds, n_classes, presorted)
+
+def presort(X):
+    """Row order of every column of X (stable), shape X.shape; shared by a forest's exact-mode trees."""
+    return np.argsort(X, axis=0, kind="stable")
+
+def bin_values(X_binned, bin_edges):
+    """
+    Real values that route like a binned matrix: each bin maps to its upper edge
+    (the last bin to +inf), so x <= threshold holds exactly when the bin does.
+    """
+    X = np.empty(X_binned.shape, dtype=np.float64)
+    for index, edges in enumerate(bin_edges):
+        X[:, index] = np.append(edges, np.inf)[X_binned[:, index]]
+    return X
+
+
+# OUT-OF-BAG EVALUATION
+class OutOfBag:
+    """
+    Out-of-bag votes for a forest's training rows, updated as chunks of trees finish.
+
+    Each row is scored only by trees whose bootstrap sample left it out (about a
+    third of them), which gives an accuracy estimate without held-out data. Rows
+    no tree left out are not counted; ties go to the lowest class.
+    """
+    def __init__(self, y, n_classes):
+        self.y = np.asarray(y)
+        self.n_classes = n_classes
+        self.votes = np.zeros(self.y.shape + (n_classes,), dtype=np.int64)
+        self.in_bag = []
+        self.n_trees = 0
+        self.history = []
+
+    def add(self, in_bag, votes):
+        """Add one chunk's bit-packed in-bag masks and out-of-bag votes."""
+        self.votes += votes
+        self.in_bag.append(in_bag)
+        self.n_trees += len(in_bag)
+        self.history.append((self.n_trees, self.accuracy()))
+
+    def converged(self, tol, rounds=2):
+        """True once the best accuracy of the last `rounds` chunks improves on the best before them by less than tol."""
+        scores = [score for _, score in self.history]
+        if len(scores) <= rounds or None in scores:
+            return False
+        return max(scores[-rounds:]) - max(scores[:-rounds]) < tol
+
+    def covered(self):
+        """Mask of rows (and outputs) with at least one out-of-bag vote."""
+        return self.votes.sum(axis=-1) > 0
+
+    def predictions(self):
+        """Out-of-bag label per row (and output); -1 where no tree left the row out."""
+        return np.where(self.covered(), self.votes.argmax(axis=-1), -1)
+
+    def accuracy(self):
+        """Share of covered rows (and outputs) whose out-of-bag label is correct."""
+        covered = self.covered()
+        return float(np.mean(self.predictions()[covered] == self.y[covered])) if covered.any() else None
+
+    def confusion(self):
+        """Counts of (true class, out-of-bag class), shape (n_classes, n_classes), or one per output."""
+        covered, preds = self.covered(), self.predictions()
+        y = self.y.reshape(len(self.y), -1)
+        covered, preds = covered.reshape(y.shape), preds.reshape(y.shape)
+        matrices = [
+            np.bincount(y[covered[:, j], j] * self.n_classes + preds[covered[:, j], j],
+                        minlength=self.n_classes ** 2).reshape(self.n_classes, self.n_classes)
+            for j in range(y.shape[1])
+        ]
+        return matrices[0] if self.y.ndim == 1 else np.array(matrices)
+
+    def summary(self):
+        """Plain values for model metadata."""
+        return {
+            "oob_accuracy": self.accuracy(),
+            "oob_coverage": float(self.covered().mean()),
+            "oob_confusion": self.confusion().tolist(),
+            "oob_curve": [[n_trees, score] for n_trees, score in self.history],
+        }
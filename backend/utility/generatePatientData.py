@@ -1,17 +1,22 @@
 # generatePatientData.py
+import argparse
+import time
 import pandas as pd
 import numpy as np
 import os
 
+HORIZON_MODIFIERS = {"1-year": 0, "2-year": 1, "5-year": 3, "10-year": 5}
+
 # CREATE DATA (Sickness Results)
 def generate_data(num_patients, output_dir="backend", seed=None):
     """
     Generate realistic dummy patient data and disease progression labels.
-    
+
     Args:
         num_patients (int): Number of patients to simulate (default=500)
         output_dir (str): Directory to save the CSV files (default=current folder)
-        
+        seed (int, optional): seeds every draw, features and labels alike
+
     Output:
         Creates:
             - patients.csv
@@ -19,10 +24,75 @@ def generate_data(num_patients, output_dir="backend", seed=None):
         Returns:
             (patients_df, labels_df)
     """
+    rng = np.random.default_rng(seed)
+    patients_df, labels_df = generate_chunk(1, num_patients, rng)
+
+    # SAVE TO FILES
+    patients_path, labels_path = output_paths(output_dir)
+    patients_df.to_csv(patients_path, index=False)
+    labels_df.to_csv(labels_path, index=False)
+
+    print(f"Created {patients_path} and {labels_path} with {num_patients} records.")
+
+    return patients_df, labels_df
+
+def write_data(num_patients, output_dir="backend", seed=None, chunk_size=1_000_000):
+    """
+    Write a large dataset in chunks of chunk_size patients (same files and schema as
+    generate_data) without holding it in memory. Returns (patients_path, labels_path).
 
+    One seeded Generator is drawn from chunk after chunk, so the output depends on
+    seed and chunk_size; with chunk_size >= num_patients it matches generate_data.
+    """
     rng = np.random.default_rng(seed)
+    patients_path, labels_path = output_paths(output_dir)
+
+    with open(patients_path, "wb") as patients_file, open(labels_path, "wb") as labels_file:
+        for start in range(0, num_patients, chunk_size):
+            patients_df, labels_df = generate_chunk(start + 1, min(chunk_size, num_patients - start), rng)
+            for df, f in ((patients_df, patients_file), (labels_df, labels_file)):
+                if start == 0:
+                    f.write((",".join(df.columns) + "\n").encode())
+                f.write(csv_lines(df))
 
-    patient_ids = np.arange(1, num_patients + 1)
+    print(f"Created {patients_path} and {labels_path} with {num_patients} records.")
+    return patients_path, labels_path
+
+def csv_lines(df):
+    """
+    Render a chunk as CSV lines (no header) with array arithmetic instead of per-value
+    string formatting. Values are non-negative; float columns hold 2-decimal numbers
+    and are written like to_csv writes them (201.9, not 201.90).
+    """
+    chars, keep = [], []
+    for i, column in enumerate(df.columns):
+        values = df[column].to_numpy()
+        decimals = 2 if values.dtype.kind == "f" else 0
+        scaled = np.rint(values * 10 ** decimals).astype(np.int64)
+
+        # Right-aligned digit matrix; `used` marks the characters that are written
+        width = max(len(str(scaled.max(initial=0))), decimals + 1)
+        digits = (scaled[:, None] // 10 ** np.arange(width - 1, -1, -1) % 10 + ord("0")).astype(np.uint8)
+        n_digits = np.maximum(1 + (scaled[:, None] >= 10 ** np.arange(1, width)).sum(axis=1), decimals + 1)
+        used = np.arange(width) >= width - n_digits[:, None]
+        if decimals:
+            digits = np.insert(digits, width - decimals, ord("."), axis=1)
+            used = np.insert(used, width - decimals, True, axis=1)
+            used[:, -1] &= scaled % 10 != 0
+
+        separator = "," if i < len(df.columns) - 1 else "\n"
+        chars += [digits, np.full((len(df), 1), ord(separator), dtype=np.uint8)]
+        keep += [used, np.ones((len(df), 1), dtype=bool)]
+    return np.hstack(chars)[np.hstack(keep)].tobytes()
+
+def output_paths(output_dir):
+    """Create output_dir and return the patients.csv and labels.csv paths in it."""
+    os.makedirs(output_dir, exist_ok=True)
+    return os.path.join(output_dir, "patients.csv"), os.path.join(output_dir, "labels.csv")
+
+def generate_chunk(first_id, num_patients, rng):
+    """Draw num_patients consecutive patients (ids from first_id) and their labels from rng."""
+    patient_ids = np.arange(first_id, first_id + num_patients)
 
     age = rng.integers(20, 80, size=num_patients)
     cholesterol = rng.normal(loc=180 + (age-20)*0.5, scale=25, size=num_patients)
@@ -46,96 +116,57 @@ def generate_data(num_patients, output_dir="backend", seed=None):
         "bmi": bmi.round(2),
     })
 
-    # CREATE LABELS (Sickness Results)
-    def disease_risk(row):
-        """
-        Calculates a cardiovascular risk score based on common clinical metrics.
-        Returns a risk score from 0 (low) to ~10 (high).
-        """
-        risk = 0
-
-        # Age
-        if row["age"] >= 65:
-            risk += 3
-        elif row["age"] >= 55:
-            risk += 2
-        elif row["age"] >= 45:
-            risk += 1
-
-        # Cholesterol (mg/dL)
-        if row["cholesterol"] >= 240:
-            risk += 3
-        elif row["cholesterol"] >= 200:
-            risk += 2
-        elif row["cholesterol"] >= 180:
-            risk += 1
-
-        # Blood pressure (systolic)
-        if row["blood_pressure"] >= 160:
-            risk += 3
-        elif row["blood_pressure"] >= 140:
-            risk += 2
-        elif row["blood_pressure"] >= 120:
-            risk += 1
-
-        # Glucose (mg/dL)
-        if row["glucose"] >= 200:
-            risk += 3
-        elif row["glucose"] >= 140:
-            risk += 2
-        elif row["glucose"] >= 100:
-            risk += 1
-
-        # BMI
-        if row["bmi"] >= 35:
-            risk += 2
-        elif row["bmi"] >= 30:
-            risk += 1
-
-        return risk
-
-
-    risks = patients_df.apply(disease_risk, axis=1)
-
-    # ASSIGN DISEASE 
-    def assign_disease(risk, modifier=0):
-        """
-        Assigns a disease category based on risk score.
-        
-        Categories:
-        0 - Healthy
-        1 - Diabetes
-        2 - Heart Disease
-        3 - Lung Disease
-        """
-        prob = np.clip(risk + modifier + np.random.normal(0, 1), 0, 14)
-        
-        if prob < 5:
-            return 0  # Healthy
-        elif prob < 9:
-            return 1  # Diabetes
-        elif prob < 12:
-            return 2  # Heart Disease
-        else:
-            return 3  # Lung Disease
-
-
-    labels_df = pd.DataFrame({
-        "patient_id": patient_ids,
-        "1-year": [assign_disease(r, 0) for r in risks],
-        "2-year": [assign_disease(r, 1) for r in risks],
-        "5-year": [assign_disease(r, 3) for r in risks],
-        "10-year": [assign_disease(r, 5) for r in risks],
-    })
+    # CREATE LABELS (Sickness Results); scored on the rounded values written to the CSV
+    risks = disease_risk(patients_df["age"].to_numpy(), patients_df["cholesterol"].to_numpy(),
+                         patients_df["blood_pressure"].to_numpy(), patients_df["glucose"].to_numpy(),
+                         patients_df["bmi"].to_numpy())
 
-    # SAVE TO FILES
-    os.makedirs(output_dir, exist_ok=True)
-    patients_path = os.path.join(output_dir, "patients.csv")
-    labels_path = os.path.join(output_dir, "labels.csv")
+    labels_df = pd.DataFrame({"patient_id": patient_ids})
+    for horizon, modifier in HORIZON_MODIFIERS.items():
+        labels_df[horizon] = assign_disease(risks, modifier, rng)
 
-    patients_df.to_csv(patients_path, index=False)
-    labels_df.to_csv(labels_path, index=False)
+    return patients_df, labels_df
 
-    print(f"Created {patients_path} and {labels_path} with {num_patients} records.")
+def disease_risk(age, cholesterol, blood_pressure, glucose, bmi):
+    """
+    Calculates a cardiovascular risk score based on common clinical metrics.
+    Returns a risk score from 0 (low) to ~14 (high) for every patient.
+    """
+    def points(values, cutoffs, scores):
+        # Highest cutoff first, like the if/elif chain it replaces
+        return np.select([values >= cutoff for cutoff in cutoffs], scores, 0)
+
+    return (
+        points(age, [65, 55, 45], [3, 2, 1]) +                  # Age
+        points(cholesterol, [240, 200, 180], [3, 2, 1]) +       # Cholesterol (mg/dL)
+        points(blood_pressure, [160, 140, 120], [3, 2, 1]) +    # Blood pressure (systolic)
+        points(glucose, [200, 140, 100], [3, 2, 1]) +           # Glucose (mg/dL)
+        points(bmi, [35, 30], [2, 1])                           # BMI
+    )
+
+# ASSIGN DISEASE
+def assign_disease(risk, modifier, rng):
+    """
+    Assigns a disease category to every risk score, with N(0, 1) noise drawn from rng.
 
-    return patients_df, labels_df
+    Categories:
+    0 - Healthy
+    1 - Diabetes
+    2 - Heart Disease
+    3 - Lung Disease
+    """
+    prob = np.clip(risk + modifier + rng.normal(0, 1, size=len(risk)), 0, 14)
+    return np.select([prob < 5, prob < 9, prob < 12], [0, 1, 2], 3)
+
+if __name__ == "__main__":
+    # Run from backend/:  python -m utility.generatePatientData 10000000 --output-dir data/scale
+    parser = argparse.ArgumentParser(description="Write a synthetic patients.csv/labels.csv pair")
+    parser.add_argument("patients", type=int)
+    parser.add_argument("--output-dir", default="data")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.time()
+    write_data(args.patients, args.output_dir, args.seed, args.chunk_size)
+    print(f"Done in {time.time() - start:.1f}s")
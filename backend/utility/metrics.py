@@ -0,0 +1,212 @@
+# metrics.py
+import bisect
+import threading
+import time
+
+# METRICS — in-process counters, gauges and latency histograms in Prometheus text format
+#
+# One process-wide registry (REGISTRY) that the API, PatientStore, MainModule and
+# ForestEngine record into; /metrics renders it. Recording is a dict lookup and a
+# few additions under one lock, so it can stay on under load.
+
+# Latency histogram bucket upper bounds in seconds (0.25 ms .. 10 s)
+LATENCY_BUCKETS = (0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histograms that do not measure latency get their own bucket bounds
+BUCKETS = {
+    "pdp_predict_batch_size": (1, 2, 4, 8, 16, 32, 64, 128, 256),
+}
+
+# name: (type, help); only declared metrics are rendered with HELP/TYPE lines
+METRICS = {
+    "pdp_http_requests_total": ("counter", "HTTP requests by method, route template and status."),
+    "pdp_http_request_duration_seconds": ("histogram", "HTTP request latency by method and route template."),
+    "pdp_stage_duration_seconds": ("histogram", "Latency of internal stages (CSV parse, filtering, scaling, traversal, ...)."),
+    "pdp_model_predict_duration_seconds": ("histogram", "RandomForest.predict latency per horizon (batch scoring)."),
+    "pdp_patient_store_reloads_total": ("counter", "Times patients.csv was parsed into the patient store."),
+    "pdp_patient_store_rows": ("gauge", "Patients in the current store snapshot."),
+    "pdp_model_load_seconds": ("gauge", "Seconds taken to load each horizon model (horizons from one model file share its load time)."),
+    "pdp_model_train_seconds": ("gauge", "Seconds taken to train each horizon model."),
+    "pdp_model_ready": ("gauge", "1 if the horizon model is serving predictions, else 0."),
+    "pdp_model_trees": ("gauge", "Trees in each horizon model."),
+    "pdp_model_nodes": ("gauge", "Tree nodes in each horizon model."),
+    "pdp_model_memory_bytes": ("gauge", "Bytes of node arrays, roots and scaler parameters per horizon model."),
+    "pdp_prediction_cache_hits_total": ("counter", "Prediction cache lookups answered from the cache."),
+    "pdp_prediction_cache_misses_total": ("counter", "Prediction cache lookups that ran the models."),
+    "pdp_prediction_cache_bypasses_total": ("counter", "Predictions computed without the cache (features with more than its precision)."),
+    "pdp_prediction_cache_entries": ("gauge", "Entries in the prediction cache."),
+    "pdp_predict_batch_size": ("histogram", "Rows per micro-batch scored for /predict."),
+    "pdp_predict_queue_wait_seconds": ("histogram", "Time a /predict row waited before its micro-batch was dispatched."),
+}
+
+class Histogram:
+    """Fixed-bucket histogram: per-bucket counts plus sum and count."""
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        """Add the observations of a histogram with the same buckets."""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+class Timer:
+    """Context manager that observes its wall time into a histogram on exit."""
+    __slots__ = ("registry", "name", "labels", "start")
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+class Registry:
+    """Thread-safe store of metric series keyed by (name, sorted labels)."""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, name, value, **labels):
+        """Add one observation to a histogram series."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.series.get(key)
+            if histogram is None:
+                histogram = self.series[key] = Histogram(BUCKETS.get(name, self.buckets))
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter series."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.series[key] = self.series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set a gauge series."""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.series[key] = value
+
+    def timer(self, name, **labels):
+        """with registry.timer("pdp_stage_duration_seconds", stage="..."): ..."""
+        return Timer(self, name, labels)
+
+    def clear(self):
+        with self.lock:
+            self.series = {}
+
+    def drain(self):
+        """Remove and return every series, e.g. to hand a worker process's observations to the parent."""
+        with self.lock:
+            series, self.series = self.series, {}
+        return series
+
+    def merge(self, series):
+        """Add drained series: histograms and counters add up, gauges are replaced."""
+        with self.lock:
+            for key, value in series.items():
+                current = self.series.get(key)
+                if isinstance(value, Histogram):
+                    if current is None:
+                        current = self.series[key] = Histogram(value.buckets)
+                    current.merge(value)
+                elif current is None or METRICS.get(key[0], ("counter",))[0] == "gauge":
+                    self.series[key] = value
+                else:
+                    self.series[key] = current + value
+
+    def render(self):
+        """All series in Prometheus text exposition format (version 0.0.4)."""
+        with self.lock:
+            snapshot = [
+                (name, labels, (value.buckets, list(value.counts), value.sum, value.count) if isinstance(value, Histogram) else value)
+                for (name, labels), value in self.series.items()
+            ]
+
+        by_name = {}
+        for name, labels, value in sorted(snapshot, key=lambda item: (item[0], item[1])):
+            by_name.setdefault(name, []).append((labels, value))
+
+        lines = []
+        for name, series in by_name.items():
+            kind, help_text = METRICS.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in series:
+                if kind == "histogram":
+                    buckets, counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(buckets, counts):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{format_labels(labels, le=repr(bound))} {cumulative}")
+                    lines.append(f"{name}_bucket{format_labels(labels, le='+Inf')} {count}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {total!r}")
+                    lines.append(f"{name}_count{format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{format_labels(labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+def format_labels(labels, **extra):
+    """{a="1",b="2"} label block (empty string for no labels)."""
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+    return "{" + ",".join(f'{key}="{escape(value)}"' for key, value in pairs) + "}"
+
+REGISTRY = Registry()
+observe = REGISTRY.observe
+inc = REGISTRY.inc
+set_gauge = REGISTRY.set
+timer = REGISTRY.timer
+render = REGISTRY.render
+
+def stage(name):
+    """Timer for one internal stage: with metrics.stage("patients.filter"): ..."""
+    return REGISTRY.timer("pdp_stage_duration_seconds", stage=name)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count and latency per route template
+    (e.g. /patients/{patient_id}), so ids in paths do not create new series.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            method = scope["method"]
+            observe("pdp_http_request_duration_seconds", time.perf_counter() - start, method=method, route=route)
+            inc("pdp_http_requests_total", method=method, route=route, status=str(status[0]))
@@ -3,7 +3,14 @@ import pandas as pd
 import numpy as np
 import joblib
 import os
-from treeUtility import randomForest
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from treeUtility import randomForest, modelFile
+from utility.patientStore import PatientStore
+from utility.predictionCache import PredictionCache
+from utility import metrics
 
 # PATIENT MANAGEMENT SYSTEM
 class MainModule:
@@ -17,27 +24,181 @@ class MainModule:
     - Predicts and updates patient data
     """
 
-    def __init__(self, patient_csv, label_csv, model_dir="models"):
+    # RandomForest settings for every horizon; forest_params overrides them (e.g. smaller forests in benchmarks,
+    # or {"oob_tol": 0.001} to stop adding trees once out-of-bag accuracy stops improving)
+    FOREST_PARAMS = {"n_trees": 600, "max_depth": 40, "min_samples_split": 3, "criterion": "gini"}
+
+    # Seconds update_patient waits before writing the model file, so a burst of updates is written once
+    SAVE_DELAY = 1.0
+
+    def __init__(self, patient_csv, label_csv, model_dir="models", n_jobs=1, store=None, defer_models=False,
+                 forest_params=None, cache_size=10000, cache_ttl=None, test_size=0.2):
             self.patient_csv = patient_csv
+            # Shared patient_id -> row index (the API passes its own store so both use one copy)
+            self.store = store if store is not None else PatientStore(patient_csv)
+            self.feature_cols = PatientStore.FIELDS[1:]
             self.label_csv = label_csv
             self.model_dir = model_dir
+            self.n_jobs = randomForest.resolve_n_jobs(n_jobs)
+            self.forest_params = {**self.FOREST_PARAMS, **(forest_params or {})}
+            # With forest_params={"oob_score": True} and test_size=0 every row is used for
+            # training and evaluate() reports the forests' out-of-bag estimate instead
+            self.test_size = test_size
             os.makedirs(self.model_dir, exist_ok=True)
 
             self.X, self.y_dict = self.load_data()
             self.X_train, self.X_test, self.y_train_dict, self.y_test_dict = self.split_all()
 
+            # All horizons live in one memory-mapped model file; older per-horizon pickles are still read
+            self.model_path = os.path.join(self.model_dir, "forest.bin")
             self.models = {}
+            self.model_status = {year: "pending" for year in self.y_dict}
+            self.on_ready = None
+
+            # Predictions for repeated feature vectors; model_version changes (and the cache is
+            # cleared) whenever a model is published, so results never outlive their models
+            self.prediction_cache = PredictionCache(cache_size, cache_ttl)
+            self.model_version = 0
+
+            # Background model file writes scheduled by update_patient (see schedule_save)
+            self.save_lock = threading.Lock()
+            self.save_pending = False
+            self.save_thread = None
+
+            # With defer_models the caller runs prepare_models() itself (e.g. in a background thread)
+            if not defer_models:
+                self.prepare_models()
+
+    def prepare_models(self, on_ready=None):
+        """
+        Load saved horizon models and train the missing ones.
+
+        Each horizon is published to self.models as soon as it is available, and
+        on_ready(year) is called, so callers can serve finished horizons while the
+        rest are still training. model_status tracks every horizon:
+        pending -> loading/training -> ready (or failed). on_ready is kept and also
+        called when update_patient swaps in refitted models.
+        """
+        self.on_ready = on_ready
+        try:
+            start = time.perf_counter()
+            saved = modelFile.load_models(self.model_path) if os.path.exists(self.model_path) else {}
+            file_load_seconds = time.perf_counter() - start
+
+            to_train = []
             for year in self.y_dict:
-                model_path = os.path.join(self.model_dir, f"{year}_model.pkl")
-                if os.path.exists(model_path):
+                pickle_path = os.path.join(self.model_dir, f"{year}_model.pkl")
+                if year in saved:
                     print(f"Loading saved model for {year}...")
-                    self.models[year] = joblib.load(model_path)
+                    metrics.set_gauge("pdp_model_load_seconds", file_load_seconds, horizon=year)
+                    self.publish_model(year, saved[year], on_ready)
+                elif os.path.exists(pickle_path):
+                    print(f"Loading saved model for {year} (pickle)...")
+                    self.model_status[year] = "loading"
+                    start = time.perf_counter()
+                    model = joblib.load(pickle_path)
+                    metrics.set_gauge("pdp_model_load_seconds", time.perf_counter() - start, horizon=year)
+                    self.publish_model(year, model, on_ready)
                 else:
-                    print(f"Training new model for {year}...")
-                    model = randomForest.RandomForest(n_trees=600, max_depth=40, min_samples_split=3, criterion="gini")
-                    model.fit(self.X_train, self.y_train_dict[year])
-                    joblib.dump(model, model_path)
-                    self.models[year] = model
+                    to_train.append(year)
+
+            # Draw each horizon's seed up front so results do not depend on thread scheduling
+            seeds = {year: np.random.randint(2**31 - 1) for year in to_train}
+
+            def train_and_publish(year, executor=None):
+                self.model_status[year] = "training"
+                start = time.perf_counter()
+                model = self.train_model(year, seeds[year], executor)
+                metrics.set_gauge("pdp_model_train_seconds", time.perf_counter() - start, horizon=year)
+                self.publish_model(year, model, on_ready)
+
+            if self.n_jobs > 1 and to_train:
+                # One process pool shared by every horizon: each thread only submits its trees and waits
+                with ProcessPoolExecutor(max_workers=self.n_jobs) as pool, ThreadPoolExecutor(len(to_train)) as threads:
+                    list(threads.map(lambda year: train_and_publish(year, pool), to_train))
+            else:
+                for year in to_train:
+                    train_and_publish(year)
+        except Exception:
+            for year, status in self.model_status.items():
+                if status != "ready":
+                    self.model_status[year] = "failed"
+            raise
+
+        if set(saved) != set(self.models):
+            self.save_models()
+
+    def publish_model(self, year, model, on_ready=None):
+        """Make one horizon model available (self.models is replaced, never mutated in place)."""
+        if model.packed is None:
+            # Forests pickled by older versions arrive without the packed node table
+            model.compile()
+        models = {**self.models, year: model}
+        self.models = {y: models[y] for y in self.y_dict if y in models}
+        self.model_version += 1
+        self.prediction_cache.clear()
+        self.model_status[year] = "ready"
+        metrics.set_gauge("pdp_model_trees", len(model.roots), horizon=year)
+        metrics.set_gauge("pdp_model_nodes", model.node_count(), horizon=year)
+        metrics.set_gauge("pdp_model_memory_bytes", model.memory_bytes(), horizon=year)
+        if on_ready is not None:
+            on_ready(year)
+
+    def train_model(self, year, random_state=None, executor=None):
+        """Train and return the Random Forest for one time horizon."""
+        print(f"Training new model for {year}...")
+        model = randomForest.RandomForest(**self.forest_params, n_jobs=self.n_jobs, random_state=random_state)
+        model.fit(self.X_train, self.y_train_dict[year], executor=executor)
+        if len(model.roots) < model.n_trees:
+            print(f"  {year}: out-of-bag accuracy converged at {len(model.roots)} of {model.n_trees} trees "
+                  f"({model.metadata['oob_accuracy'] * 100:.2f}%)")
+        model.metadata.update({"horizon": year, "patient_csv": self.patient_csv, "label_csv": self.label_csv})
+        return model
+
+    def save_models(self):
+        """Write every horizon model to the model file."""
+        modelFile.save_models(self.models, self.model_path, metadata={"horizons": list(self.models)})
+
+    def schedule_save(self):
+        """
+        Write the model file in a background thread, SAVE_DELAY seconds from now; updates
+        scheduled meanwhile are covered by the same write. flush_models() waits for it.
+        """
+        with self.save_lock:
+            self.save_pending = True
+            if self.save_thread is None:
+                # Not a daemon: the interpreter waits for a pending write before it exits
+                self.save_thread = threading.Thread(target=self.background_save)
+                self.save_thread.start()
+
+    def background_save(self):
+        """Save thread: write the current models while writes keep being scheduled."""
+        while True:
+            time.sleep(self.SAVE_DELAY)
+            with self.save_lock:
+                if not self.save_pending:
+                    self.save_thread = None
+                    return
+                self.save_pending = False
+            try:
+                self.save_models()
+            except Exception:
+                traceback.print_exc()
+
+    def flush_models(self):
+        """Wait until scheduled model file writes have finished."""
+        thread = self.save_thread
+        if thread is not None:
+            thread.join()
+
+    def memory_report(self):
+        """Print and return the memory report of every horizon model (see RandomForest.memory_report)."""
+        reports = {year: model.memory_report() for year, model in self.models.items()}
+        print(f"\n{'horizon':>8} {'trees':>6} {'nodes':>9} {'leaves':>9} {'table MB':>9} {'total MB':>9}")
+        for year, report in reports.items():
+            print(f"{year:>8} {report['trees']:>6} {report['nodes']:>9} {report['leaves']:>9} "
+                  f"{report['node_table_bytes'] / 2**20:>9.2f} {report['total_bytes'] / 2**20:>9.2f}")
+        return reports
 
     def load_data(self):
         """Load features and labels from CSVs."""
@@ -50,8 +211,10 @@ class MainModule:
 
         return X, y_dict
     
-    def split_all(self, test_size=0.2, random_state=42):
-        """Split features and all label sets into train/test subsets."""
+    def split_all(self, test_size=None, random_state=42):
+        """Split features and all label sets into train/test subsets (test_size defaults to self.test_size)."""
+        if test_size is None:
+            test_size = self.test_size
         n = self.X.shape[0]
         idx = np.arange(n)
         np.random.seed(random_state)
@@ -59,6 +222,7 @@ class MainModule:
 
         split = int(n * (1 - test_size))
         train_idx, test_idx = idx[:split], idx[split:]
+        self.train_idx, self.test_idx = train_idx, test_idx
 
         X_train, X_test = self.X[train_idx], self.X[test_idx]
 
@@ -68,57 +232,142 @@ class MainModule:
         return X_train, X_test, y_train_dict, y_test_dict
 
     def evaluate(self):
-        """Evaluate model accuracy on unseen test data."""
+        """Evaluate model accuracy on unseen test data, or out-of-bag when there is none."""
 
         print("\nModel Performance on Test Data:")
         for year, model in self.models.items():
-            y_pred = model.predict(self.X_test)
-            y_true = self.y_test_dict[year]
-            acc = np.mean(y_pred == y_true)
-            print(f"  {year}: {acc * 100:.2f}% accuracy")
+            oob = model.metadata.get("oob_accuracy")
+            if len(self.X_test):
+                y_pred = model.predict(self.X_test)
+                y_true = self.y_test_dict[year]
+                acc = np.mean(y_pred == y_true)
+                line = f"  {year}: {acc * 100:.2f}% accuracy"
+                if oob is not None:
+                    line += f" (out-of-bag {oob * 100:.2f}%)"
+                print(line)
+            elif oob is not None:
+                print(f"  {year}: {oob * 100:.2f}% out-of-bag accuracy")
+                print(f"    confusion (rows true, columns predicted): {model.metadata['oob_confusion']}")
+            else:
+                print(f"  {year}: no test rows and no out-of-bag estimate")
 
     def predict_patient(self, patient_id):
         """Predict diseases for a single patient across all future years."""
-        patients_df = pd.read_csv(self.patient_csv)
+        patient = self.store.get(patient_id)
 
-        if patient_id not in patients_df["patient_id"].values:
+        if patient is None:
             print(f"Patient {patient_id} not found.")
             return
 
-        patient_row = (patients_df.loc[patients_df["patient_id"] == patient_id].drop(columns=["patient_id"]).to_numpy())
+        patient_row = [patient[col] for col in self.feature_cols]
 
         disease_names = ["Healthy", "Diabetes", "Heart Disease", "Lung Disease"]
         print(f"\nPredictions for Patient {patient_id}:")
-        print(f"  Current features: {patient_row.tolist()[0]}")
+        print(f"  Current features: {patient_row}")
 
-        for year, model in self.models.items():
-            pred = model.predict(patient_row)[0]
+        for year, pred in self.predict_cached(patient_row).items():
             print(f"  → {year}: {disease_names[pred]}")
 
-    def update_patient(self, patient_id, new_features):
+    def predict_cached(self, features):
+        """{horizon: label} for one feature vector, served from the prediction cache when possible."""
+        version, models = self.model_version, self.models
+        return self.prediction_cache.get_or_compute(
+            ("models", version), features,
+            lambda x: {year: int(model.predict([x])[0]) for year, model in models.items()})
+
+    def update_patient(self, patient_id, new_features, max_refit_fraction=0.1):
         """
-        Update patient data and optionally retrain.
-        
+        Update patient data and refit the affected trees.
+
+        patients.csv is still rewritten in full on every update. The model file is
+        written in the background (see schedule_save), once per burst of updates;
+        call flush_models() before exiting to be sure it holds the refitted trees.
+
         Args:
             patient_id (int): Patient ID to update
             new_features (list): [cholesterol, blood_pressure, age, glucose, bmi]
+            max_refit_fraction (float): most trees per forest refitted for this update
         """
-        patients_df = pd.read_csv(self.patient_csv)
-        if patient_id not in patients_df["patient_id"].values:
+        # X holds every CSV row, including rows the store skipped as unparseable
+        offset = self.store.file_row(patient_id)
+        if offset is None:
             print(f"Patient {patient_id} not found.")
             return
 
-        feature_cols = patients_df.columns[1:]
-        patients_df.loc[patients_df["patient_id"] == patient_id, feature_cols] = new_features
-        patients_df.to_csv(self.patient_csv, index=False)
+        record = dict(zip(self.feature_cols, new_features))
+        self.store.upsert({"patient_id": patient_id, **record}, write=True)
+        self.X[offset] = new_features
 
         print(f"\nUpdated patient {patient_id} data in CSV.")
-        print(f"   New features: {dict(zip(feature_cols, new_features))}")
+        print(f"   New features: {record}")
 
-        # Reload updated data and retrain (for demo purposes)
-        self.X, self.y_dict = self.load_data()
+        # The split is seeded, so the patient keeps its place and only its feature values change
         self.X_train, self.X_test, self.y_train_dict, self.y_test_dict = self.split_all()
-        self.train_all()
+        self.refit_models(offset, max_refit_fraction)
+
+    def refit_models(self, offset, max_refit_fraction=0.1):
+        """
+        Incrementally retrain every horizon after the patient at row `offset` changed.
+
+        Only trees whose bootstrap sample drew that patient can change. Up to
+        max_refit_fraction of each forest is refitted (trees that drew the patient
+        most often first, then trees left stale by earlier updates); the rest are
+        recorded in metadata["stale_trees"] and refitted by a later update, or
+        cleared by a full retrain. Each new forest is built beside the old one and
+        published in a single swap, so predictions never see a half-updated forest.
+        """
+        train_rows = np.flatnonzero(self.train_idx == offset)
+        if not train_rows.size:
+            print("   Patient is in the test split; models unchanged.")
+            return
+
+        for year, model in self.models.items():
+            metadata = getattr(model, "metadata", None) or {}
+            if "random_state" not in metadata or metadata.get("n_samples") != len(self.X_train):
+                # Older model (no recorded seed) or another training set: the bootstrap samples cannot be regenerated
+                print(f"   {year}: tree seeds unknown, retraining the full forest...")
+                self.publish_model(year, self.train_model(year), self.on_ready)
+                continue
+
+            counts = model.in_bag_counts(train_rows)[:, 0]
+            affected = np.flatnonzero(counts)
+            stale = sorted(set(metadata.get("stale_trees", [])) - set(affected.tolist()))
+            pending = np.concatenate((affected[np.argsort(-counts[affected], kind="stable")], stale)).astype(int)
+            limit = max(1, int(len(counts) * max_refit_fraction))
+            chosen, left = pending[:limit], pending[limit:]
+            print(f"   {year}: refitting {len(chosen)} of {len(affected)} affected trees "
+                  f"({len(stale)} stale from earlier updates, {len(counts)} total)")
+            if len(chosen):
+                refitted = model.refit_trees(self.X_train, self.y_train_dict[year], chosen)
+                refitted.metadata["stale_trees"] = sorted(left.tolist())
+                self.publish_model(year, refitted, self.on_ready)
+
+        self.schedule_save()
+
+    def predict_many(self, features=None, start_id=None, end_id=None):
+        """
+        Predict every horizon for many patients at once.
+
+        Args:
+            features (array-like, optional): (n, 5) matrix of [cholesterol, blood_pressure, age, glucose, bmi]
+            start_id, end_id (int, optional): score stored patients in this id range instead (inclusive)
+
+        Returns:
+            DataFrame with one label column per ready horizon (plus patient_id for stored
+            patients). Each horizon scales and scores the whole matrix in one batched call.
+        """
+        result = pd.DataFrame()
+        if features is None:
+            data = self.store.refresh()
+            offsets = self.store.id_range(start_id, end_id, data=data)
+            features = self.store.feature_matrix(offsets, data=data)
+            result["patient_id"] = data["columns"]["patient_id"][offsets]
+
+        X = np.asarray(features, dtype=np.float64).reshape(-1, len(self.feature_cols))
+        for year, model in self.models.items():
+            with metrics.timer("pdp_model_predict_duration_seconds", horizon=year):
+                result[year] = model.predict(X) if len(X) else np.empty(0, dtype=np.int64)
+        return result
 
     def predict_new_patient(self, new_features):
         """
@@ -126,15 +375,14 @@ class MainModule:
         Args:
             new_features (list or array): [cholesterol, blood_pressure, age, glucose, bmi]
         """
-        new_features = np.array(new_features).reshape(1, -1)
+        new_features = np.array(new_features).reshape(-1).tolist()
         disease_names = ["Healthy", "Diabetes", "Heart Disease", "Lung Disease"]
         results = {}
 
         print("\nPredictions for New Patient:")
-        print(f"  Input features: {new_features.tolist()[0]}")
+        print(f"  Input features: {new_features}")
 
-        for year, model in self.models.items():
-            pred = model.predict(new_features)[0]
+        for year, pred in self.predict_cached(new_features).items():
             print(f"  → {year}: {disease_names[pred]}")
             results[year] = disease_names[pred]
         return results
@@ -0,0 +1,96 @@
+# patientStats.py
+import math
+import numpy as np
+
+# PATIENT STATS — running aggregates behind /patients/stats
+class PatientStats:
+    """
+    Count, sums (for means), min/max and fixed-bucket histograms over the patient
+    columns.
+
+    Built once with vectorized passes, then kept current in O(1) per added, removed
+    or updated patient. Histogram buckets span the current min..max, so a change
+    that moves an extreme (a value outside the range, or removing a value equal to
+    min or max) marks the aggregates stale; they are rebuilt from the columns on
+    the next read.
+    """
+    AVERAGE_FIELDS = ["age", "bmi", "cholesterol", "blood_pressure", "glucose"]
+    HISTOGRAM_FIELDS = ["age", "bmi", "cholesterol"]
+    BUCKETS = 10
+
+    def __init__(self, columns):
+        self.rebuild(columns)
+
+    def rebuild(self, columns):
+        """Recompute every aggregate from the column arrays."""
+        self.count = len(columns["patient_id"])
+        self.sums = {field: math.fsum(columns[field].tolist()) for field in self.AVERAGE_FIELDS}
+        self.mins, self.maxs, self.edges, self.hist_counts = {}, {}, {}, {}
+        if self.count:
+            for field in self.AVERAGE_FIELDS:
+                self.mins[field] = columns[field].min().item()
+                self.maxs[field] = columns[field].max().item()
+            for field in self.HISTOGRAM_FIELDS:
+                mn, mx = self.mins[field], self.maxs[field]
+                self.edges[field] = mn + np.arange(self.BUCKETS) * ((mx - mn) / self.BUCKETS)
+                self.hist_counts[field] = np.bincount(self.bucket(field, columns[field]), minlength=self.BUCKETS)
+        self.stale = False
+
+    def bucket(self, field, values):
+        """Bucket index of each value: bucket b holds lo_b <= v < lo_b+1, and the last bucket also holds max."""
+        return np.clip(np.searchsorted(self.edges[field], values, side="right") - 1, 0, self.BUCKETS - 1)
+
+    def add(self, record):
+        """Account for one new patient record (dict of field values)."""
+        self.count += 1
+        for field in self.AVERAGE_FIELDS:
+            value = record[field]
+            self.sums[field] += value
+            if self.count == 1 or not self.mins[field] <= value <= self.maxs[field]:
+                self.stale = True
+        if not self.stale:
+            for field in self.HISTOGRAM_FIELDS:
+                self.hist_counts[field][self.bucket(field, record[field])] += 1
+
+    def remove(self, record):
+        """Account for one patient record leaving the data set."""
+        self.count -= 1
+        for field in self.AVERAGE_FIELDS:
+            value = record[field]
+            self.sums[field] -= value
+            if value == self.mins[field] or value == self.maxs[field]:
+                self.stale = True
+        if not self.stale:
+            for field in self.HISTOGRAM_FIELDS:
+                self.hist_counts[field][self.bucket(field, record[field])] -= 1
+
+    def update(self, old_record, new_record):
+        """Account for one patient whose values changed."""
+        self.remove(old_record)
+        self.add(new_record)
+
+    def summary(self, columns):
+        """Return the /patients/stats payload, rebuilding from columns first if stale."""
+        if self.stale:
+            self.rebuild(columns)
+        if not self.count:
+            return {"count": 0, "averages": {}, "histograms": {}}
+
+        histograms = {}
+        for field in self.HISTOGRAM_FIELDS:
+            mn, mx = self.mins[field], self.maxs[field]
+            if mn == mx:
+                histograms[field] = [{"min": mn, "max": mx, "count": self.count}]
+                continue
+            step = (mx - mn) / self.BUCKETS
+            histograms[field] = [
+                {"min": lo, "max": lo + step, "count": count}
+                for lo, count in zip(self.edges[field].tolist(), self.hist_counts[field].tolist())
+            ]
+
+        return {
+            "count": self.count,
+            "averages": {field: self.sums[field] / self.count for field in self.AVERAGE_FIELDS},
+            "ranges": {field: {"min": self.mins[field], "max": self.maxs[field]} for field in self.AVERAGE_FIELDS},
+            "histograms": histograms,
+        }
@@ -0,0 +1,263 @@
+# patientStore.py
+import os
+import threading
+import numpy as np
+import pandas as pd
+from utility.patientStats import PatientStats
+from utility import metrics
+
+# PATIENT STORE — in-memory columnar copy of patients.csv
+class PatientStore:
+    """
+    Process-wide columnar view of the patients CSV.
+
+    Each field is held as one NumPy array, plus a patient_id -> row index. The file
+    is parsed once and re-read only when its mtime or size changes, so requests no
+    longer pay for a full parse. A reload builds a new snapshot and swaps it in with
+    one assignment; readers holding the old snapshot keep a consistent view.
+    """
+    FIELDS = ["patient_id", "cholesterol", "blood_pressure", "age", "glucose", "bmi"]
+    INT_FIELDS = ("patient_id", "age")
+
+    def __init__(self, csv_path):
+        self.csv_path = csv_path
+        self.lock = threading.Lock()
+        self.signature = None
+        self.data = None
+        self.refresh()
+
+    def file_signature(self):
+        """(mtime, size) of the CSV, or None if it does not exist."""
+        try:
+            stat = os.stat(self.csv_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def refresh(self):
+        """Reload the CSV if it changed since the last load; return the current snapshot."""
+        signature = self.file_signature()
+        if signature != self.signature:
+            with self.lock:
+                if signature != self.signature:
+                    with metrics.stage("patients.load"):
+                        self.data = self.load()
+                    self.signature = signature
+                    metrics.inc("pdp_patient_store_reloads_total")
+                    metrics.set_gauge("pdp_patient_store_rows", len(self.data["columns"]["patient_id"]))
+        return self.data
+
+    def load(self):
+        """
+        Parse the CSV into typed columns. Rows with a missing or non-numeric field are
+        skipped; the file as read is then kept too ("raw", with "file_rows" mapping
+        column offsets to file rows), so rewriting the CSV never drops those rows.
+        """
+        if not os.path.exists(self.csv_path):
+            raw = pd.DataFrame(columns=self.FIELDS)
+        else:
+            raw = pd.read_csv(self.csv_path)
+        df = raw[self.FIELDS].apply(pd.to_numeric, errors="coerce")
+        parsed = df.notna().all(axis=1).to_numpy()
+        df = df[parsed]
+        exact = parsed.all() and list(raw.columns) == self.FIELDS
+
+        columns = {}
+        for field in self.FIELDS:
+            values = df[field].to_numpy(dtype=np.float64, copy=True)
+            columns[field] = values.astype(np.int64) if field in self.INT_FIELDS else values
+
+        ids = columns["patient_id"].tolist()
+        return {
+            "columns": columns,
+            "index": dict(zip(ids, range(len(ids)))),
+            "raw": None if exact else raw,
+            "file_rows": None if exact else np.flatnonzero(parsed),
+            "rows": None,
+            "orders": {},
+            "text": {},
+            "stats": None,
+        }
+
+    def columns(self):
+        """Current {field: array} columns."""
+        return self.refresh()["columns"]
+
+    def __len__(self):
+        return len(self.columns()["patient_id"])
+
+    def row_offset(self, patient_id):
+        """Row position of patient_id in the columns, or None."""
+        return self.refresh()["index"].get(int(patient_id))
+
+    def file_row(self, patient_id):
+        """Row position of patient_id in the CSV (counting rows the columns skipped), or None."""
+        data = self.refresh()
+        offset = data["index"].get(int(patient_id))
+        if offset is None or data["file_rows"] is None:
+            return offset
+        return int(data["file_rows"][offset])
+
+    def get(self, patient_id):
+        """Return one patient as a dict, or None if the id is unknown."""
+        data = self.refresh()
+        offset = data["index"].get(int(patient_id))
+        if offset is None:
+            return None
+        return {field: data["columns"][field][offset].item() for field in self.FIELDS}
+
+    def rows(self):
+        """All patients as a list of dicts (built once per load)."""
+        data = self.refresh()
+        if data["rows"] is None:
+            values = [data["columns"][field].tolist() for field in self.FIELDS]
+            data["rows"] = [dict(zip(self.FIELDS, row)) for row in zip(*values)]
+        return data["rows"]
+
+    def stats(self):
+        """/patients/stats payload from the running aggregates (built on first use per load)."""
+        data = self.refresh()
+        with self.lock:
+            if data["stats"] is None:
+                data["stats"] = PatientStats(data["columns"])
+            return data["stats"].summary(data["columns"])
+
+    def upsert(self, record, write=False):
+        """
+        Apply one added or updated patient (dict with every field) in place.
+
+        With write=True the CSV is rewritten from the columns (no re-read), or from the
+        kept raw rows when the file has rows or columns the columns do not hold; otherwise
+        call this after the change has been written to the CSV. Either way the file's
+        new signature is adopted so the change does not trigger a full reload. Running
+        stats are updated in O(1); cached sort orders and row dicts are rebuilt on next use.
+        """
+        record = {field: (int(record[field]) if field in self.INT_FIELDS else float(record[field]))
+                  for field in self.FIELDS}
+        with self.lock:
+            data = self.data
+            columns = data["columns"]
+            offset = data["index"].get(record["patient_id"])
+            raw = data["raw"]
+            if offset is None:
+                offset = len(columns["patient_id"])
+                for field in self.FIELDS:
+                    columns[field] = np.append(columns[field], np.array(record[field], dtype=columns[field].dtype))
+                data["index"][record["patient_id"]] = offset
+                if raw is not None:
+                    data["file_rows"] = np.append(data["file_rows"], len(raw))
+                    raw = data["raw"] = pd.concat([raw, pd.DataFrame([record])], ignore_index=True)
+                if data["stats"] is not None:
+                    data["stats"].add(record)
+            else:
+                old_record = {field: columns[field][offset].item() for field in self.FIELDS}
+                for field in self.FIELDS:
+                    columns[field][offset] = record[field]
+                if raw is not None:
+                    raw.loc[data["file_rows"][offset], self.FIELDS] = [record[field] for field in self.FIELDS]
+                if data["stats"] is not None:
+                    data["stats"].update(old_record, record)
+
+            data["rows"] = None
+            data["orders"] = {}
+            data["text"] = {}
+            if write:
+                (pd.DataFrame(columns) if raw is None else raw).to_csv(self.csv_path, index=False)
+            self.signature = self.file_signature()
+
+    def id_range(self, start_id=None, end_id=None, data=None):
+        """Row offsets of patients with start_id <= patient_id <= end_id (either bound optional), in id order."""
+        data = data or self.refresh()
+        ids = data["columns"]["patient_id"]
+        mask = np.ones(len(ids), dtype=bool)
+        if start_id is not None: mask &= ids >= start_id
+        if end_id is not None: mask &= ids <= end_id
+        offsets = np.flatnonzero(mask)
+        return offsets[np.argsort(ids[offsets], kind="stable")]
+
+    def feature_matrix(self, offsets, data=None):
+        """(len(offsets), 5) float matrix of the model features, in FIELDS order without patient_id."""
+        columns = (data or self.refresh())["columns"]
+        return np.column_stack([columns[field][offsets] for field in self.FIELDS[1:]]).astype(np.float64)
+
+    def records(self, offsets, data=None):
+        """Patients at the given row offsets, as a list of dicts."""
+        columns = (data or self.refresh())["columns"]
+        values = [columns[field][offsets].tolist() for field in self.FIELDS]
+        return [dict(zip(self.FIELDS, row)) for row in zip(*values)]
+
+    def sort_order(self, field, descending=False, data=None):
+        """
+        Cached (permutation, rank) for sorting by field.
+
+        The permutation is a stable sort (equal values keep file order, also when
+        descending, like list.sort(reverse=True)); rank is its inverse, a unique
+        sort key per row.
+        """
+        data = data or self.refresh()
+        key = (field, descending)
+        if key not in data["orders"]:
+            values = data["columns"][field]
+            perm = np.argsort(-values if descending else values, kind="stable")
+            rank = np.empty_like(perm)
+            rank[perm] = np.arange(len(perm))
+            data["orders"][key] = (perm, rank)
+        return data["orders"][key]
+
+    def text_column(self, field, data=None):
+        """Cached string form of an integer column, for substring search."""
+        data = data or self.refresh()
+        if field not in data["text"]:
+            data["text"][field] = data["columns"][field].astype(str)
+        return data["text"][field]
+
+    def filter_mask(self, q=None, min_age=None, max_age=None, min_bmi=None, max_bmi=None, data=None):
+        """
+        Boolean row mask for the /patients filters, or None when nothing is filtered.
+        A digit-only q matches patient_id or age as a substring; any other q matches patient_id.
+        """
+        data = data or self.refresh()
+        columns = data["columns"]
+        mask = None
+
+        def combine(condition):
+            return condition if mask is None else mask & condition
+
+        if min_age is not None: mask = combine(columns["age"] >= min_age)
+        if max_age is not None: mask = combine(columns["age"] <= max_age)
+        if min_bmi is not None: mask = combine(columns["bmi"] >= min_bmi)
+        if max_bmi is not None: mask = combine(columns["bmi"] <= max_bmi)
+        if q:
+            ql = q.lower()
+            matches = np.char.find(self.text_column("patient_id", data), ql) >= 0
+            if ql.isdigit():
+                # Few distinct ages: test each once, then map back to rows
+                ages = np.unique(columns["age"])
+                matching_ages = [age for age in ages.tolist() if ql in str(age)]
+                matches |= np.isin(columns["age"], matching_ages)
+            mask = combine(matches)
+        return mask
+
+    def page(self, mask, sort_by, descending, start, stop, data=None):
+        """
+        Return (total matching rows, records for sorted positions start:stop).
+
+        Sorting uses the cached permutation for the column: with no filter the page
+        is a slice of it; otherwise the filtered rows' ranks go through argpartition,
+        so only the rows up to stop are ever sorted.
+        """
+        data = data or self.refresh()
+        perm, rank = self.sort_order(sort_by, descending, data)
+        if mask is None:
+            return len(perm), self.records(perm[start:stop], data)
+
+        selected = np.flatnonzero(mask)
+        total = len(selected)
+        if start >= total:
+            return total, []
+
+        keys = rank[selected]
+        k = min(stop, total)
+        top = np.argpartition(keys, k - 1)[:k] if k < total else np.arange(total)
+        top = top[np.argsort(keys[top])]
+        return total, self.records(selected[top[start:stop]], data)
@@ -0,0 +1,147 @@
+# predictionBatcher.py
+import asyncio
+import multiprocessing
+import time
+import numpy as np
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from treeUtility import modelFile
+from treeUtility.forestEngine import ForestEngine
+from utility import metrics
+
+# PREDICTION BATCHER — micro-batches concurrent /predict rows into one engine call
+class PredictionBatcher:
+    """
+    Collects single-row predictions from concurrent requests into one matrix and
+    scores it with one ForestEngine.predict_rows call, off the event loop.
+
+    A batch is dispatched once it holds max_batch rows or max_wait seconds after its
+    first row arrived, whichever comes first. Each worker takes one batch at a time,
+    so while a batch is being scored the next one fills up on its own.
+
+    workers > 0 scores batches in that many worker processes, so traversal runs
+    outside the API process's GIL. Each worker gets every engine version once: an
+    engine over a model file (engine.source) is rebuilt in the worker by mapping
+    the same file, any other engine is pickled over. The engine stage timings
+    recorded in the worker come back with each batch. workers=0 scores batches on
+    the event loop's default thread pool.
+    """
+    def __init__(self, max_batch=64, max_wait=0.002, workers=1):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.workers = workers
+        self.queue = None
+        self.tasks = []
+        self.executors = []
+
+    def start(self):
+        """Start the collector tasks (and worker processes) on the running event loop."""
+        if self.tasks:
+            return
+        self.queue = asyncio.Queue()
+        self.executors = [self.new_executor() for _ in range(self.workers)]
+        self.tasks = [asyncio.create_task(self.collect(index)) for index in range(max(self.workers, 1))]
+
+    def new_executor(self):
+        """One single-process pool per worker, so the batcher knows which engine each process holds."""
+        # spawn, not fork: the API process has other threads that may hold locks
+        return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+    async def stop(self):
+        """Cancel the collectors and shut the worker processes down."""
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        for executor in self.executors:
+            executor.shutdown(cancel_futures=True)
+        self.tasks, self.executors = [], []
+
+    async def predict(self, engine, features):
+        """Score one row with engine; returns what engine.predict_one(features) would."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((engine, features, time.perf_counter(), future))
+        return await future
+
+    async def collect(self, index):
+        """Worker loop: gather a batch, score it with worker `index`, resolve every waiting request."""
+        loaded_version = None
+        while True:
+            batch = [await self.queue.get()]
+            deadline = batch[0][2] + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                try:
+                    batch.append(self.queue.get_nowait() if timeout <= 0 else
+                                 await asyncio.wait_for(self.queue.get(), timeout))
+                except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                    break
+
+            dispatched = time.perf_counter()
+            metrics.observe("pdp_predict_batch_size", len(batch))
+            for _, _, queued, _ in batch:
+                metrics.observe("pdp_predict_queue_wait_seconds", dispatched - queued)
+
+            # Rows queued around an engine swap are scored by the engine they were sent with
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[0].version, []).append(item)
+            for version, items in groups.items():
+                engine = items[0][0]
+                X = np.array([features for _, features, _, _ in items], dtype=np.float64)
+                try:
+                    with metrics.stage("predict.batch"):
+                        if not self.executors:
+                            results = await asyncio.get_running_loop().run_in_executor(None, engine.predict_rows, X)
+                        else:
+                            results = await self.score_in_worker(index, engine, X, version != loaded_version)
+                            loaded_version = version
+                except Exception as exc:
+                    loaded_version = None
+                    if isinstance(exc, BrokenExecutor):
+                        self.executors[index] = self.new_executor()
+                    for _, _, _, future in items:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, _, _, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+
+    async def score_in_worker(self, index, engine, X, send):
+        """Score X in worker `index`; send hands the worker the engine (or its model file) first."""
+        executor = self.executors[index]
+        if not send:
+            reply = await asyncio.wrap_future(executor.submit(score_batch, X, engine.version))
+        elif engine.source is not None:
+            reply = await asyncio.wrap_future(executor.submit(score_batch, X, engine.version, source=engine.source))
+        else:
+            reply = None
+        if reply is None:
+            # Not mapped from a file, or the file has been replaced since: pickle the engine over
+            reply = await asyncio.wrap_future(executor.submit(score_batch, X, engine.version, engine))
+        results, stages = reply
+        metrics.REGISTRY.merge(stages)
+        return results
+
+# Engine held by a worker process, keyed by its version
+WORKER_ENGINES = {}
+
+def score_batch(X, version, engine=None, source=None):
+    """
+    Worker entry point: score X with the engine for version and return (results,
+    stage metrics recorded meanwhile). The first batch of a version brings the
+    engine, or its source (path, mtime_ns, model names) to map the model file again;
+    returns None if that file has been replaced since the engine was built.
+    """
+    if source is not None:
+        path, mtime_ns, names = source
+        models = modelFile.load_models(path)
+        engine = ForestEngine({name: models[name] for name in names})
+        if engine.source != source:
+            return None
+    if engine is not None:
+        WORKER_ENGINES.clear()
+        WORKER_ENGINES[version] = engine
+    metrics.REGISTRY.drain()
+    results = WORKER_ENGINES[version].predict_rows(X)
+    return results, metrics.REGISTRY.drain()
@@ -0,0 +1,116 @@
+# predictionCache.py
+import threading
+import time
+from collections import OrderedDict
+from utility import metrics
+
+# PREDICTION CACHE — bounded LRU of prediction results for repeated patient inputs
+class PredictionCache:
+    """
+    Thread-safe LRU cache of predictions keyed on (model version, rounded features).
+
+    Features are rounded to `decimals` places (the precision of patients.csv) to
+    form the key, but the prediction always runs on the submitted values: inputs
+    with more precision than that do not round-trip through the key, so they are
+    computed without the cache (counted as bypasses) and never share an entry with
+    a different vector. A cached answer is therefore the one the model gives. The version is whatever identifies the
+    models that produced the value; a new version never sees older entries, and
+    clear() drops them when models are swapped.
+
+    max_size=0 disables caching; ttl (seconds) expires entries, None keeps them
+    until evicted.
+    """
+    def __init__(self, max_size=10000, ttl=None, decimals=2):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.decimals = decimals
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bypasses = 0
+
+    def key(self, features):
+        """Normalized feature tuple used as the cache key."""
+        return tuple(round(float(value), self.decimals) for value in features)
+
+    def get(self, version, key):
+        """Cached value for (version, key), or None on a miss or expired entry."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get((version, key))
+            if entry is not None and (entry[1] is None or entry[1] > now):
+                self.entries.move_to_end((version, key))
+                self.hits += 1
+                metrics.inc("pdp_prediction_cache_hits_total")
+                return entry[0]
+            if entry is not None:
+                del self.entries[(version, key)]
+            self.misses += 1
+        metrics.inc("pdp_prediction_cache_misses_total")
+        return None
+
+    def put(self, version, key, value):
+        """Store a value, evicting the least recently used entries beyond max_size."""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[(version, key)] = (value, expires)
+            self.entries.move_to_end((version, key))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def cache_key(self, features):
+        """The key for features, or None when they do not round-trip through it (not cached)."""
+        if self.max_size <= 0:
+            return None
+        key = self.key(features)
+        if key != tuple(float(value) for value in features):
+            with self.lock:
+                self.bypasses += 1
+            metrics.inc("pdp_prediction_cache_bypasses_total")
+            return None
+        return key
+
+    def get_or_compute(self, version, features, compute):
+        """Return the cached value for features, or compute(features) and cache it."""
+        key = self.cache_key(features)
+        if key is None:
+            return compute(list(features))
+        value = self.get(version, key)
+        if value is None:
+            value = compute(list(features))
+            self.put(version, key, value)
+        return value
+
+    async def get_or_compute_async(self, version, features, compute):
+        """get_or_compute for a coroutine function compute (e.g. PredictionBatcher.predict)."""
+        key = self.cache_key(features)
+        if key is None:
+            return await compute(list(features))
+        value = self.get(version, key)
+        if value is None:
+            value = await compute(list(features))
+            self.put(version, key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry (hit/miss counts are kept)."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bypasses": self.bypasses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
@@ -0,0 +1,60 @@
+# streamScoring.py
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from treeUtility import modelFile
+from treeUtility.forestEngine import ForestEngine
+
+FEATURE_COLS = ["cholesterol", "blood_pressure", "age", "glucose", "bmi"]
+HORIZONS = ["1-year", "2-year", "5-year", "10-year"]
+
+# STREAMING SCORING — score patient files larger than memory, one block at a time
+
+def load_saved_models(model_dir="models"):
+    """Return {horizon: model} from the model file, falling back to per-horizon pickles."""
+    model_path = os.path.join(model_dir, "forest.bin")
+    models = modelFile.load_models(model_path) if os.path.exists(model_path) else {}
+    for year in HORIZONS:
+        pickle_path = os.path.join(model_dir, f"{year}_model.pkl")
+        if year not in models and os.path.exists(pickle_path):
+            models[year] = joblib.load(pickle_path)
+    return models
+
+def iter_patient_chunks(patient_csv, chunk_size):
+    """Yield the patient file as DataFrames of at most chunk_size rows."""
+    with pd.read_csv(patient_csv, chunksize=chunk_size) as reader:
+        yield from reader
+
+def score_chunks(chunks, engine):
+    """For each patient block, yield a DataFrame of patient_id (if present) and one label column per horizon."""
+    for chunk in chunks:
+        result = pd.DataFrame()
+        if "patient_id" in chunk.columns:
+            result["patient_id"] = chunk["patient_id"].to_numpy()
+        X = chunk[FEATURE_COLS].to_numpy(dtype=np.float64)
+        for year, labels in engine.predict(X).items():
+            result[year] = labels
+        yield result
+
+def score_file(patient_csv, output_csv, models, chunk_size=50000, progress=print):
+    """
+    Score patient_csv block by block and append each block's predictions to output_csv.
+
+    Peak memory depends on chunk_size, not the file size: only one block of
+    patients and its predictions are held at a time. Returns (rows, seconds).
+    """
+    engine = ForestEngine(models)
+    start = time.perf_counter()
+    rows = 0
+
+    with open(output_csv, "w", newline="") as out:
+        for i, block in enumerate(score_chunks(iter_patient_chunks(patient_csv, chunk_size), engine)):
+            block.to_csv(out, index=False, header=(i == 0))
+            rows += len(block)
+            elapsed = time.perf_counter() - start
+            if progress is not None:
+                progress(f"  {rows:,} rows scored ({rows / elapsed:,.0f} rows/s)")
+
+    return rows, time.perf_counter() - start
@@ -52,9 +52,10 @@ export default function Dashboard() {
       });
       const result = await response.json();
       const newPredictions = Object.entries(result.predictions || {}).map(
-        ([year, label]) => ({ year, label })
+        ([year, label]) => ({ year, label, confidence: result.confidence?.[year] })
       );
-      setDiseaseData(newPredictions);
+      const pending = (result.pending || []).map((year) => ({ year, label: "Model loading..." }));
+      setDiseaseData([...newPredictions, ...pending]);
     } catch (error) {
       console.error("Prediction failed:", error);
     } finally {
@@ -175,7 +176,12 @@ export default function Dashboard() {
                       {diseaseIcons[d.label] || <ActivityLogIcon className="w-5 h-5 text-gray-400" />}
                       <span className="font-medium text-gray-900">{d.label}</span>
                     </div>
-                    <span className="text-gray-700">{d.year}</span>
+                    <span className="text-gray-700">
+                      {d.year}
+                      {d.confidence != null && (
+                        <span className="ml-2 text-sm text-gray-500">{Math.round(d.confidence * 100)}%</span>
+                      )}
+                    </span>
                   </motion.div>
                 ))
               )}